@@ -3,38 +3,141 @@ EVduty charging stations integration
 """
 from __future__ import annotations
 
+import os
+from datetime import timedelta
+
 from evdutyapi import EVDutyApi
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform, CONF_USERNAME, CONF_PASSWORD
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform, CONF_USERNAME, CONF_PASSWORD, CONF_CURRENCY, CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryError, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import DOMAIN, LOGGER, CONF_OCPP_PASSWORD, CONF_ID_TAGS
 from .coordinator import EVDutyCoordinator
+from .ocpp import OcppCentralSystem, parse_id_tags
+from .services import async_setup_services
+from .session_log import SessionLog
+from .significant_change import policies_from_options
+from .tariff import Tariff
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# coordinators of unloaded entries, kept until the timeout to set them up again warm when reloaded
+UNLOADED_COORDINATORS = f'{DOMAIN}_unloaded_coordinators'
+UNLOADED_COORDINATOR_TIMEOUT = timedelta(minutes=1)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    evduty_api = EVDutyApi(entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], async_get_clientsession(hass))
-    evduty_coordinator = EVDutyCoordinator(hass, evduty_api)
+    previous_coordinator = _pop_unloaded_coordinator(hass, entry)
+    if previous_coordinator is not None:
+        evduty_api = previous_coordinator.api
+    else:
+        evduty_api = EVDutyApi(entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD], async_get_clientsession(hass))
+    session_log = SessionLog(_session_log_path(hass, entry))
+    await hass.async_add_executor_job(session_log.open)
+    evduty_coordinator = EVDutyCoordinator(hass, evduty_api, Tariff.from_options(entry.options, hass.config.currency), session_log, policies_from_options(entry.options),
+                                           entry.options.get(CONF_CURRENCY) or hass.config.currency)
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = evduty_coordinator
 
-    await evduty_coordinator.async_config_entry_first_refresh()
+    if previous_coordinator is not None:
+        LOGGER.debug('Reloading with the last data, skipping first refresh')
+        evduty_coordinator.restore(previous_coordinator)
+    else:
+        try:
+            await evduty_coordinator.async_config_entry_first_refresh()
+        except (ConfigEntryNotReady, ConfigEntryAuthFailed, ConfigEntryError):
+            # setup is retried with a new coordinator and session log
+            hass.data[DOMAIN].pop(entry.entry_id)
+            await hass.async_add_executor_job(session_log.close)
+            raise
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if (settings := _central_system_settings(entry.options)) is not None:
+        host, port, password, id_tags = settings
+        central_system = OcppCentralSystem(evduty_coordinator, port, password, host, id_tags)
+        try:
+            await central_system.async_start()
+            evduty_coordinator.central_system = central_system
+            entry.async_on_unload(central_system.async_stop)
+        except OSError as error:
+            LOGGER.error(f'Cannot start OCPP central system on port {port}, using EVduty cloud only: {error}')
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        evduty_coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await evduty_coordinator.async_shutdown()
+        await hass.async_add_executor_job(evduty_coordinator.session_log.close)
+
+        @callback
+        def evict_unloaded_coordinator(_) -> None:
+            hass.data.get(UNLOADED_COORDINATORS, {}).pop(entry.entry_id, None)
+
+        cancel_eviction = async_call_later(hass, UNLOADED_COORDINATOR_TIMEOUT, evict_unloaded_coordinator)
+        hass.data.setdefault(UNLOADED_COORDINATORS, {})[entry.entry_id] = (evduty_coordinator, cancel_eviction)
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    _pop_unloaded_coordinator(hass, entry)
+    path = _session_log_path(hass, entry)
+    if await hass.async_add_executor_job(os.path.exists, path):
+        await hass.async_add_executor_job(os.remove, path)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    evduty_coordinator = hass.data[DOMAIN][entry.entry_id]
+    central_system_settings = evduty_coordinator.central_system.settings if evduty_coordinator.central_system else None
+    if _central_system_settings(entry.options) != central_system_settings:
+        await async_reload_entry(hass, entry)
+        return
+
+    evduty_coordinator.set_tariff(Tariff.from_options(entry.options, hass.config.currency))
+    evduty_coordinator.currency = entry.options.get(CONF_CURRENCY) or hass.config.currency
+    evduty_coordinator.significant_change_policies = policies_from_options(entry.options)
+    evduty_coordinator.async_update_listeners()
+
+
+def _central_system_settings(options: dict) -> tuple | None:
+    if options.get(CONF_PORT) is None or not options.get(CONF_OCPP_PASSWORD):
+        return None
+    return options.get(CONF_HOST) or None, options[CONF_PORT], options[CONF_OCPP_PASSWORD], parse_id_tags(options.get(CONF_ID_TAGS, ''))
+
+
+def _session_log_path(hass: HomeAssistant, entry: ConfigEntry) -> str:
+    return hass.config.path(STORAGE_DIR, f'{DOMAIN}_{entry.entry_id}.db')
+
+
+def _pop_unloaded_coordinator(hass: HomeAssistant, entry: ConfigEntry) -> EVDutyCoordinator | None:
+    coordinator, cancel_eviction = hass.data.get(UNLOADED_COORDINATORS, {}).pop(entry.entry_id, (None, None))
+    if coordinator is None:
+        return None
+    cancel_eviction()
+    if coordinator.data is None:
+        return None
+    if (coordinator.api.username, coordinator.api.password) != (entry.data[CONF_USERNAME], entry.data[CONF_PASSWORD]):
+        return None
+    return coordinator
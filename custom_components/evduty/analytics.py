@@ -0,0 +1,53 @@
+"""
+EVduty charging session statistics aggregated as samples arrive
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+
+class SessionStatistics:
+    """Running aggregates of a charging session, each sample is added in constant time and memory."""
+
+    def __init__(self, start: datetime) -> None:
+        self.start = start
+        self.last_at: datetime | None = None
+        self.power = 0
+        self.energy = 0
+        self.peak_power = 0
+        self.energy_rate = 0
+        self.charging_seconds = 0
+        self.idle_seconds = 0
+        self._power_seconds = 0
+
+    def add(self, at: datetime, power: float, energy: float) -> None:
+        """Add a sample of power (W) and cumulative energy (Wh), the previous power is held until this sample."""
+        if self.last_at is not None:
+            if at <= self.last_at:
+                return
+            seconds = (at - self.last_at).total_seconds()
+            if self.power > 0:
+                self.charging_seconds += seconds
+                self._power_seconds += self.power * seconds
+            else:
+                self.idle_seconds += seconds
+            self.energy_rate = max(energy - self.energy, 0) / 1000 / (seconds / 3600)
+
+        self.last_at = at
+        self.power = power
+        self.energy = energy
+        self.peak_power = max(self.peak_power, power)
+
+    @property
+    def average_power(self) -> float:
+        """Average power (W) while drawing."""
+        if self.charging_seconds == 0:
+            return self.power
+        return self._power_seconds / self.charging_seconds
+
+    @property
+    def plugged_average_power(self) -> float:
+        """Energy (kWh) per hour of plug-in time, in kW."""
+        if self.last_at is None or self.last_at <= self.start:
+            return 0
+        return self.energy / 1000 / ((self.last_at - self.start).total_seconds() / 3600)
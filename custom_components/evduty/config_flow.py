@@ -8,11 +8,16 @@ from typing import Any
 import voluptuous as vol
 from evdutyapi import EVDutyApi, EVDutyApiInvalidCredentialsError, EVDutyApiError
 from homeassistant import config_entries
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_CURRENCY, CONF_HOST, CONF_PORT
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig, TextSelectorType
 from homeassistant.helpers.aiohttp_client import async_create_clientsession
 
-from .const import DOMAIN, LOGGER
+from .const import DOMAIN, LOGGER, CONF_ENERGY_RATE, CONF_TOU_SCHEDULE, CONF_ABSOLUTE_DEADBAND, CONF_RELATIVE_DEADBAND, CONF_MIN_INTERVAL, CONF_OCPP_PASSWORD, CONF_ID_TAGS
+from .significant_change import SENSOR_TYPES, option_key
+from .tariff import parse_schedule
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -58,6 +63,63 @@ class EVDutyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return self.async_show_form(step_id='user', data_schema=STEP_USER_DATA_SCHEMA, errors=errors)
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return EVDutyOptionsFlow(config_entry)
+
     async def async_step_reauth(self, data: dict[str, Any] | None = None) -> FlowResult:
         self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
         return await self.async_step_user(data)
+
+
+class EVDutyOptionsFlow(config_entries.OptionsFlowWithConfigEntry):
+
+    async def async_step_init(self, data: dict[str, Any] | None = None) -> FlowResult:
+        errors: dict[str, str] = {}
+        if data is not None:
+            try:
+                parse_schedule(data.get(CONF_TOU_SCHEDULE, ''))
+            except ValueError:
+                errors[CONF_TOU_SCHEDULE] = 'invalid_schedule'
+            if data.get(CONF_TOU_SCHEDULE) and data.get(CONF_ENERGY_RATE) is None:
+                errors[CONF_ENERGY_RATE] = 'energy_rate_required'
+            if data.get(CONF_PORT) is not None and not data.get(CONF_OCPP_PASSWORD):
+                errors[CONF_OCPP_PASSWORD] = 'password_required'
+            if not errors:
+                for cleared in (CONF_ENERGY_RATE, CONF_HOST, CONF_PORT, CONF_OCPP_PASSWORD, CONF_ID_TAGS):
+                    self.options.pop(cleared, None)
+                self.options.update(data)
+                return await self.async_step_significant_change()
+
+        return self.async_show_form(step_id='init', data_schema=self._options_schema(), errors=errors)
+
+    async def async_step_significant_change(self, data: dict[str, Any] | None = None) -> FlowResult:
+        if data is not None:
+            self.options.update(data)
+            return self.async_create_entry(title='', data=self.options)
+
+        return self.async_show_form(step_id='significant_change', data_schema=self._significant_change_schema())
+
+    def _options_schema(self) -> vol.Schema:
+        return vol.Schema(
+            {
+                vol.Optional(CONF_CURRENCY, default=self.options.get(CONF_CURRENCY, self.hass.config.currency)): cv.currency,
+                vol.Optional(CONF_ENERGY_RATE, description={'suggested_value': self.options.get(CONF_ENERGY_RATE)}): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(CONF_TOU_SCHEDULE, default=self.options.get(CONF_TOU_SCHEDULE, '')): str,
+                vol.Optional(CONF_HOST, description={'suggested_value': self.options.get(CONF_HOST)}): str,
+                vol.Optional(CONF_PORT, description={'suggested_value': self.options.get(CONF_PORT)}): vol.All(vol.Coerce(int), vol.Range(min=1, max=65535)),
+                vol.Optional(CONF_OCPP_PASSWORD, description={'suggested_value': self.options.get(CONF_OCPP_PASSWORD)}): TextSelector(TextSelectorConfig(type=TextSelectorType.PASSWORD)),
+                vol.Optional(CONF_ID_TAGS, description={'suggested_value': self.options.get(CONF_ID_TAGS)}): str,
+            }
+        )
+
+    def _significant_change_schema(self) -> vol.Schema:
+        schema = {}
+        for sensor_type, absolute_deadband in SENSOR_TYPES.items():
+            schema.update({
+                vol.Optional(option_key(sensor_type, CONF_ABSOLUTE_DEADBAND), default=self.options.get(option_key(sensor_type, CONF_ABSOLUTE_DEADBAND), absolute_deadband)): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(option_key(sensor_type, CONF_RELATIVE_DEADBAND), default=self.options.get(option_key(sensor_type, CONF_RELATIVE_DEADBAND), 0)): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Optional(option_key(sensor_type, CONF_MIN_INTERVAL), default=self.options.get(option_key(sensor_type, CONF_MIN_INTERVAL), 0)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            })
+        return vol.Schema(schema)
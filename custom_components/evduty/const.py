@@ -4,3 +4,11 @@ LOGGER: Logger = getLogger(__package__)
 
 DOMAIN = 'evduty'
 MANUFACTURER = 'EVduty'
+
+CONF_ENERGY_RATE = 'energy_rate'
+CONF_TOU_SCHEDULE = 'tou_schedule'
+CONF_ABSOLUTE_DEADBAND = 'absolute_deadband'
+CONF_RELATIVE_DEADBAND = 'relative_deadband'
+CONF_MIN_INTERVAL = 'min_interval'
+CONF_OCPP_PASSWORD = 'ocpp_password'
+CONF_ID_TAGS = 'id_tags'
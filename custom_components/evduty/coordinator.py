@@ -1,29 +1,92 @@
+from __future__ import annotations
+
 import asyncio
-from datetime import timedelta
+import sqlite3
+from copy import copy
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from http import HTTPStatus
+from typing import TYPE_CHECKING
 
-from evdutyapi import EVDutyApi, Terminal, EVDutyApiInvalidCredentialsError, EVDutyApiError
+from evdutyapi import EVDutyApi, Terminal, ChargingSession, ChargingStatus, EVDutyApiInvalidCredentialsError, EVDutyApiError
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
 
+from .analytics import SessionStatistics
 from .const import DOMAIN, LOGGER
+from .session_log import SessionLog, LoggedSession
+from .significant_change import SignificantChangePolicy
+from .tariff import Tariff, SessionCostMeter
+
+if TYPE_CHECKING:
+    from .ocpp import OcppCentralSystem
+
+LOCAL_READING_TIMEOUT = timedelta(minutes=5)
+
+
+@dataclass
+class TerminalReading:
+    """Values pushed by a charger on the local network, overriding the EVduty cloud ones."""
+    updated_at: datetime
+    status: ChargingStatus | None = None
+    volt: float | None = None
+    amp: float | None = None
+    power: float | None = None
+    energy_consumed: float | None = None
+
+    def apply(self, terminal: Terminal) -> Terminal:
+        terminal = copy(terminal)
+        terminal.session = copy(terminal.session)
+        if self.status is not None:
+            terminal.status = self.status
+        for field in ('volt', 'amp', 'power', 'energy_consumed'):
+            if (value := getattr(self, field)) is not None:
+                setattr(terminal.session, field, value)
+        return terminal
 
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
 class EVDutyCoordinator(DataUpdateCoordinator):
     config_entry: ConfigEntry
 
-    def __init__(self, hass: HomeAssistant, api: EVDutyApi) -> None:
+    def __init__(self, hass: HomeAssistant, api: EVDutyApi, tariff: Tariff | None = None, session_log: SessionLog | None = None,
+                 significant_change_policies: dict[str, SignificantChangePolicy] | None = None, currency: str | None = None) -> None:
         super().__init__(hass=hass, logger=LOGGER, name=DOMAIN, update_interval=timedelta(seconds=60))
         self.api = api
+        self.tariff = tariff
+        self.currency = currency
+        self.session_log = session_log
+        self.significant_change_policies = significant_change_policies or {}
+        self.active_sessions: dict[str, ChargingSession] = {}
+        self.cost_meters: dict[str, SessionCostMeter] = {}
+        self.session_statistics: dict[str, SessionStatistics] = {}
+        self.local_readings: dict[str, TerminalReading] = {}
+        self.central_system: OcppCentralSystem | None = None
+        self._fetch_task: asyncio.Task | None = None
 
     async def _async_update_data(self) -> dict[str, Terminal]:
+        # fetch in its own task so a shutdown can cancel it without cancelling the caller
+        self._fetch_task = asyncio.create_task(self._async_fetch_terminals())
+        try:
+            return await self._fetch_task
+        except asyncio.CancelledError:
+            if self._shutdown_requested and not asyncio.current_task().cancelling():
+                LOGGER.debug('Refresh cancelled by shutdown. Returning last data')
+                return self.data
+            raise
+        finally:
+            self._fetch_task = None
+
+    async def _async_fetch_terminals(self) -> dict[str, Terminal]:
         try:
             async with asyncio.timeout(10):
                 stations = await self.api.async_get_stations()
-                return {terminal.id: terminal for station in stations for terminal in station.terminals}
+                terminals = self._apply_local_readings({terminal.id: terminal for station in stations for terminal in station.terminals})
+                self._record_samples(terminals, dt_util.utcnow())
+                return terminals
         except EVDutyApiInvalidCredentialsError as error:
             raise ConfigEntryAuthFailed from error
         except EVDutyApiError as error:
@@ -32,3 +95,102 @@ class EVDutyCoordinator(DataUpdateCoordinator):
                 return self.data
             else:
                 raise ConnectionError from error
+
+    async def async_shutdown(self) -> None:
+        """Stop refreshing, cancelling any refresh in flight and waiting for it to end."""
+        await super().async_shutdown()
+        if (fetch_task := self._fetch_task) is not None:
+            fetch_task.cancel()
+            await asyncio.wait([fetch_task])
+
+    def restore(self, previous: EVDutyCoordinator) -> None:
+        """Continue from the last data and session state of the coordinator of a reloaded entry."""
+        self.data = previous.data
+        self.last_update_success = previous.last_update_success
+        self.active_sessions = previous.active_sessions
+        self.cost_meters = previous.cost_meters
+        self.session_statistics = previous.session_statistics
+        self.local_readings = previous.local_readings
+        self.set_tariff(self.tariff)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        if self._shutdown_requested:
+            return
+        if self.session_log is not None and self.session_log.pending:
+            if self.config_entry is not None:
+                self.config_entry.async_create_background_task(self.hass, self._async_flush_session_log(), f'{DOMAIN} session log flush')
+            else:
+                self.hass.async_create_background_task(self._async_flush_session_log(), f'{DOMAIN} session log flush')
+        super().async_update_listeners()
+
+    async def _async_flush_session_log(self) -> None:
+        try:
+            await self.hass.async_add_executor_job(self.session_log.flush)
+        except sqlite3.Error as error:
+            LOGGER.error(f'Cannot write the charging sessions log, retrying at the next update: {error}')
+
+    @callback
+    def async_set_local_reading(self, terminal_id: str, reading: TerminalReading | None) -> None:
+        """Push local values between cloud refreshes, without delaying the next refresh."""
+        if reading is None:
+            self.local_readings.pop(terminal_id, None)
+            return
+
+        self.local_readings[terminal_id] = reading
+        if self.data is not None and terminal_id in self.data:
+            terminal = reading.apply(self.data[terminal_id])
+            self.data = {**self.data, terminal_id: terminal}
+            self._record_samples({terminal_id: terminal}, dt_util.utcnow())
+            self.async_update_listeners()
+
+    def set_tariff(self, tariff: Tariff | None) -> None:
+        self.tariff = tariff
+        for meter in self.cost_meters.values():
+            meter.recompute(tariff)
+
+    def _apply_local_readings(self, terminals: dict[str, Terminal]) -> dict[str, Terminal]:
+        expired_at = dt_util.utcnow() - LOCAL_READING_TIMEOUT
+        for terminal_id, reading in list(self.local_readings.items()):
+            if reading.updated_at < expired_at:
+                LOGGER.debug(f'Local reading of terminal {terminal_id} expired, using EVduty data')
+                del self.local_readings[terminal_id]
+            elif terminal_id in terminals:
+                terminals[terminal_id] = reading.apply(terminals[terminal_id])
+        return terminals
+
+    def _record_samples(self, terminals: dict[str, Terminal] | None, now: datetime) -> None:
+        for terminal_id, terminal in (terminals or {}).items():
+            session = terminal.session
+            previous = self.active_sessions.get(terminal_id)
+            if previous is not None and (not session.is_active or previous.start_date != session.start_date):
+                self._log_session(terminal_id, previous)
+
+            if not session.is_active:
+                self.active_sessions.pop(terminal_id, None)
+                self.cost_meters.pop(terminal_id, None)
+                self.session_statistics.pop(terminal_id, None)
+                continue
+            self.active_sessions[terminal_id] = session
+
+            meter = self.cost_meters.get(terminal_id)
+            if meter is None or meter.start != session.start_date:
+                meter = self.cost_meters[terminal_id] = SessionCostMeter(session.start_date)
+            meter.add(now, session.energy_consumed, self.tariff)
+
+            statistics = self.session_statistics.get(terminal_id)
+            if statistics is None or statistics.start != session.start_date:
+                statistics = self.session_statistics[terminal_id] = SessionStatistics(session.start_date)
+            statistics.add(now, session.power, session.energy_consumed)
+
+    def _log_session(self, terminal_id: str, session: ChargingSession) -> None:
+        if self.session_log is None:
+            return
+        meter = self.cost_meters[terminal_id]
+        statistics = self.session_statistics[terminal_id]
+        self.session_log.add(LoggedSession(terminal_id=terminal_id,
+                                           start=session.start_date,
+                                           end=statistics.last_at,
+                                           energy=session.energy_consumed / 1000,
+                                           cost=meter.cost if self.tariff is not None else session.cost,
+                                           peak_power=statistics.peak_power))
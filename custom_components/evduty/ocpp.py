@@ -0,0 +1,235 @@
+"""
+EVduty charging stations local OCPP 1.6-J central system
+"""
+from __future__ import annotations
+
+import hmac
+import json
+from dataclasses import replace
+from typing import Any, Callable
+
+from aiohttp import web, BasicAuth, WSMsgType, WSCloseCode, hdrs
+from evdutyapi import ChargingStatus
+from homeassistant.util import dt as dt_util
+
+from .const import LOGGER
+from .coordinator import EVDutyCoordinator, TerminalReading
+
+# https://www.oasis-open.org/committees/download.php/58944/ocpp-j-1.6-specification.pdf
+SUBPROTOCOL = 'ocpp1.6'
+CALL = 2
+CALLRESULT = 3
+CALLERROR = 4
+
+HEARTBEAT_INTERVAL = 60
+
+CHARGE_POINT_STATUSES = {
+    'Available': ChargingStatus.available,
+    'Preparing': ChargingStatus.in_use,
+    'Charging': ChargingStatus.in_use,
+    'SuspendedEV': ChargingStatus.in_use,
+    'SuspendedEVSE': ChargingStatus.in_use,
+    'Finishing': ChargingStatus.in_use,
+    'Reserved': ChargingStatus.available,
+    'Unavailable': ChargingStatus.out_of_service,
+    'Faulted': ChargingStatus.out_of_service,
+}
+
+MEASURANDS = {
+    'Energy.Active.Import.Register': 'energy',
+    'Power.Active.Import': 'power',
+    'Current.Import': 'amp',
+    'Voltage': 'volt',
+}
+
+# connector 0 is the main controller of the charge point, only its faults apply to the terminal
+MAIN_CONTROLLER = 0
+MAIN_CONTROLLER_STATUSES = ('Unavailable', 'Faulted')
+
+# first phase only, split-phase charging stations report their voltage line to line
+PHASES = ('L1', 'L1-N')
+VOLTAGE_PHASES = ('L1', 'L1-N', 'L1-L2')
+
+
+class OcppCentralSystem:
+    """Receives status and meter values pushed by the charge points, at ws://<host>:<port>/<charge box identity>.
+
+    Charge points authenticate with HTTP Basic auth, their charge box identity and the password (OCPP 1.6 security profile 1).
+    When id tags are configured, only those are authorized, otherwise the charge points authorize tags themselves and every tag is accepted.
+    """
+
+    def __init__(self, coordinator: EVDutyCoordinator, port: int, password: str, host: str | None = None, id_tags: frozenset[str] = frozenset()) -> None:
+        self.coordinator = coordinator
+        self.port = port
+        self.password = password
+        self.host = host
+        self.id_tags = id_tags
+        self._runner: web.AppRunner | None = None
+        self._connections: dict[str, web.WebSocketResponse] = {}
+        self._meter_starts: dict[str, float] = {}
+        self._transaction_id = 0
+        self._handlers: dict[str, Callable[[str, dict[str, Any]], dict[str, Any]]] = {
+            'Authorize': self._authorize,
+            'BootNotification': self._boot_notification,
+            'Heartbeat': self._heartbeat,
+            'MeterValues': self._meter_values,
+            'StartTransaction': self._start_transaction,
+            'StatusNotification': self._status_notification,
+            'StopTransaction': self._stop_transaction,
+        }
+
+    @property
+    def settings(self) -> tuple:
+        return self.host, self.port, self.password, self.id_tags
+
+    @property
+    def addresses(self) -> list:
+        return self._runner.addresses if self._runner is not None else []
+
+    async def async_start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self._async_handle_connection)
+        self._runner = web.AppRunner(app, handle_signals=False)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=self.host, port=self.port).start()
+        LOGGER.info(f'OCPP central system listening on {self.host or "all interfaces"}, port {self.port}')
+
+    async def async_stop(self) -> None:
+        for ws in list(self._connections.values()):
+            await ws.close(code=WSCloseCode.GOING_AWAY)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _async_handle_connection(self, request: web.Request) -> web.StreamResponse:
+        charge_point_id = request.match_info['path'].rstrip('/').rsplit('/', 1)[-1]
+        if not self._is_authenticated(request, charge_point_id):
+            LOGGER.warning(f'Rejecting OCPP charge point {charge_point_id} with invalid credentials from {request.remote}')
+            raise web.HTTPUnauthorized(headers={hdrs.WWW_AUTHENTICATE: 'Basic realm="OCPP"'})
+
+        terminal_id = self._terminal_id(charge_point_id)
+        if terminal_id is None:
+            LOGGER.warning(f'Rejecting unknown OCPP charge point {charge_point_id}')
+            raise web.HTTPNotFound()
+
+        ws = web.WebSocketResponse(protocols=(SUBPROTOCOL,), heartbeat=HEARTBEAT_INTERVAL)
+        await ws.prepare(request)
+        LOGGER.debug(f'OCPP charge point {charge_point_id} connected')
+
+        previous = self._connections.get(terminal_id)
+        self._connections[terminal_id] = ws
+        if previous is not None:
+            await previous.close(code=WSCloseCode.GOING_AWAY)
+
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                if (response := self._handle_message(terminal_id, message.data)) is not None:
+                    await ws.send_str(json.dumps(response))
+        finally:
+            if self._connections.get(terminal_id) is ws:
+                del self._connections[terminal_id]
+                self.coordinator.async_set_local_reading(terminal_id, None)
+            LOGGER.debug(f'OCPP charge point {charge_point_id} disconnected')
+
+        return ws
+
+    def _handle_message(self, terminal_id: str, data: str) -> list | None:
+        try:
+            message_type, unique_id, *payload = json.loads(data)
+        except (ValueError, TypeError):
+            LOGGER.warning(f'Ignoring invalid OCPP message: {data}')
+            return None
+
+        if message_type != CALL:
+            return None
+
+        try:
+            action, request = payload
+            handler = self._handlers.get(action)
+            if handler is None:
+                return [CALLERROR, unique_id, 'NotImplemented', f'{action} is not supported', {}]
+            return [CALLRESULT, unique_id, handler(terminal_id, request)]
+        except (KeyError, ValueError, TypeError, AttributeError) as error:
+            LOGGER.warning(f'Invalid OCPP request: {data}')
+            return [CALLERROR, unique_id, 'FormationViolation', str(error), {}]
+
+    def _is_authenticated(self, request: web.Request, charge_point_id: str) -> bool:
+        try:
+            auth = BasicAuth.decode(request.headers[hdrs.AUTHORIZATION])
+        except (KeyError, ValueError):
+            return False
+        return auth.login == charge_point_id and hmac.compare_digest(auth.password.encode(), self.password.encode())
+
+    def _id_tag_info(self, id_tag: str) -> dict[str, Any]:
+        return {'status': 'Accepted' if not self.id_tags or id_tag in self.id_tags else 'Invalid'}
+
+    def _terminal_id(self, charge_point_id: str) -> str | None:
+        return next((terminal.id for terminal in (self.coordinator.data or {}).values() if terminal.charge_box_identity == charge_point_id), None)
+
+    def _reading(self, terminal_id: str) -> TerminalReading:
+        reading = self.coordinator.local_readings.get(terminal_id)
+        if reading is None:
+            return TerminalReading(updated_at=dt_util.utcnow())
+        return replace(reading, updated_at=dt_util.utcnow())
+
+    def _authorize(self, terminal_id: str, request: dict[str, Any]) -> dict[str, Any]:
+        return {'idTagInfo': self._id_tag_info(request['idTag'])}
+
+    def _boot_notification(self, terminal_id: str, request: dict[str, Any]) -> dict[str, Any]:
+        return {'status': 'Accepted', 'currentTime': dt_util.utcnow().isoformat(), 'interval': HEARTBEAT_INTERVAL}
+
+    def _heartbeat(self, terminal_id: str, request: dict[str, Any]) -> dict[str, Any]:
+        self.coordinator.async_set_local_reading(terminal_id, self._reading(terminal_id))
+        return {'currentTime': dt_util.utcnow().isoformat()}
+
+    def _status_notification(self, terminal_id: str, request: dict[str, Any]) -> dict[str, Any]:
+        if request['connectorId'] == MAIN_CONTROLLER and request['status'] not in MAIN_CONTROLLER_STATUSES:
+            return {}
+        reading = self._reading(terminal_id)
+        reading.status = CHARGE_POINT_STATUSES.get(request['status'], reading.status)
+        self.coordinator.async_set_local_reading(terminal_id, reading)
+        return {}
+
+    def _meter_values(self, terminal_id: str, request: dict[str, Any]) -> dict[str, Any]:
+        if request['connectorId'] == MAIN_CONTROLLER:
+            return {}
+        reading = self._reading(terminal_id)
+        for meter_value in request['meterValue']:
+            for sampled_value in meter_value['sampledValue']:
+                measurand = MEASURANDS.get(sampled_value.get('measurand', 'Energy.Active.Import.Register'))
+                if measurand is None or sampled_value.get('phase', 'L1') not in (VOLTAGE_PHASES if measurand == 'volt' else PHASES):
+                    continue
+                value = float(sampled_value['value'])
+                if sampled_value.get('unit') in ('kW', 'kWh'):
+                    value *= 1000
+                if measurand == 'energy':
+                    if terminal_id in self._meter_starts:
+                        reading.energy_consumed = max(value - self._meter_starts[terminal_id], 0)
+                else:
+                    setattr(reading, measurand, value)
+        self.coordinator.async_set_local_reading(terminal_id, reading)
+        return {}
+
+    def _start_transaction(self, terminal_id: str, request: dict[str, Any]) -> dict[str, Any]:
+        self._meter_starts[terminal_id] = float(request['meterStart'])
+        self._transaction_id += 1
+        reading = self._reading(terminal_id)
+        reading.energy_consumed = 0
+        self.coordinator.async_set_local_reading(terminal_id, reading)
+        return {'transactionId': self._transaction_id, 'idTagInfo': self._id_tag_info(request['idTag'])}
+
+    def _stop_transaction(self, terminal_id: str, request: dict[str, Any]) -> dict[str, Any]:
+        self._meter_starts.pop(terminal_id, None)
+        reading = self._reading(terminal_id)
+        reading.power = 0
+        reading.amp = 0
+        reading.energy_consumed = None
+        self.coordinator.async_set_local_reading(terminal_id, reading)
+        return {'idTagInfo': self._id_tag_info(request['idTag'])} if 'idTag' in request else {}
+
+
+def parse_id_tags(id_tags: str) -> frozenset[str]:
+    """Parse comma separated id tags."""
+    return frozenset(id_tag.strip() for id_tag in id_tags.split(',') if id_tag.strip())
@@ -10,7 +10,7 @@ from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.util import slugify
+from homeassistant.util import slugify, dt as dt_util
 
 from . import EVDutyCoordinator
 from .const import DOMAIN, MANUFACTURER, LOGGER
@@ -30,6 +30,11 @@ async def async_setup_entry(hass, entry, async_add_devices) -> None:
         sensors.append(ChargingSessionStartDateSensor(coordinator, terminal))
         sensors.append(ChargingSessionDurationSensor(coordinator, terminal))
         sensors.append(ChargingSessionEstimatedCostSensor(coordinator, terminal))
+        sensors.append(ChargingSessionPeakPowerSensor(coordinator, terminal))
+        sensors.append(ChargingSessionAveragePowerSensor(coordinator, terminal))
+        sensors.append(ChargingSessionPluggedAveragePowerSensor(coordinator, terminal))
+        sensors.append(ChargingSessionIdleDurationSensor(coordinator, terminal))
+        sensors.append(EnergyRateSensor(coordinator, terminal))
         sensors.append(WifiIpSensor(coordinator, terminal))
         sensors.append(WifiSsidSensor(coordinator, terminal))
         sensors.append(WifiRssiSensor(coordinator, terminal))
@@ -56,11 +61,49 @@ class EVDutyTerminalDevice(CoordinatorEntity):
 
     @callback
     def _handle_coordinator_update(self) -> None:
+        previous = self._terminal
         self._terminal = self.coordinator.data[self._terminal.id]
-        self.async_write_ha_state()
+        if self._is_transition(previous, self._terminal) or self._is_significant_update():
+            self.async_write_ha_state()
 
+    @staticmethod
+    def _is_transition(previous: Terminal, terminal: Terminal) -> bool:
+        return (previous.status != terminal.status or
+                previous.session.is_active != terminal.session.is_active or
+                previous.session.start_date != terminal.session.start_date)
 
-class PowerSensor(EVDutyTerminalDevice, SensorEntity):
+    def _is_significant_update(self) -> bool:
+        return True
+
+
+class SignificantChangeSensor(EVDutyTerminalDevice, SensorEntity):
+    """Skips state writes of readings jittering within the significant change policy of its sensor type."""
+    _significant_change_type: str
+
+    def __init__(self, coordinator: EVDutyCoordinator, terminal: Terminal, sensor_name: str) -> None:
+        super().__init__(coordinator, terminal, sensor_name)
+        self._written_value = None
+        self._written_at: datetime | None = None
+        self._written_available: bool | None = None
+
+    def _is_significant_update(self) -> bool:
+        if self.available != self._written_available:
+            return True
+        policy = self.coordinator.significant_change_policies.get(self._significant_change_type)
+        if policy is None:
+            return True
+        return policy.should_write(self._written_value, self._written_at, self.native_value, dt_util.utcnow())
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._written_value = self.native_value
+        self._written_at = dt_util.utcnow()
+        self._written_available = self.available
+        super().async_write_ha_state()
+
+
+class PowerSensor(SignificantChangeSensor):
+    _significant_change_type = 'power'
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.POWER
     _attr_native_unit_of_measurement = UnitOfPower.WATT
@@ -73,7 +116,8 @@ class PowerSensor(EVDutyTerminalDevice, SensorEntity):
         return self._terminal.session.power
 
 
-class AmpSensor(EVDutyTerminalDevice, SensorEntity):
+class AmpSensor(SignificantChangeSensor):
+    _significant_change_type = 'amp'
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.CURRENT
     _attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
@@ -86,7 +130,8 @@ class AmpSensor(EVDutyTerminalDevice, SensorEntity):
         return self._terminal.session.amp
 
 
-class VoltSensor(EVDutyTerminalDevice, SensorEntity):
+class VoltSensor(SignificantChangeSensor):
+    _significant_change_type = 'volt'
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.VOLTAGE
     _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
@@ -155,15 +200,84 @@ class ChargingSessionDurationSensor(EVDutyTerminalDevice, SensorEntity):
 class ChargingSessionEstimatedCostSensor(EVDutyTerminalDevice, SensorEntity):
     _attr_state_class = SensorStateClass.TOTAL_INCREASING
     _attr_device_class = SensorDeviceClass.MONETARY
-    _attr_native_unit_of_measurement = '$'
     _attr_suggested_display_precision = 2
 
     def __init__(self, coordinator: EVDutyCoordinator, terminal: Terminal) -> None:
         super().__init__(coordinator, terminal, 'Session Estimated Cost')
 
+    @property
+    def native_unit_of_measurement(self):
+        return self.coordinator.currency
+
     @property
     def native_value(self):
-        return self._terminal.session.cost
+        if self.coordinator.tariff is None:
+            return self._terminal.session.cost
+        meter = self.coordinator.cost_meters.get(self._terminal.id)
+        return meter.cost if meter is not None else 0
+
+
+class ChargingSessionStatisticsSensor(EVDutyTerminalDevice, SensorEntity):
+    _statistic: str
+
+    @property
+    def native_value(self):
+        statistics = self.coordinator.session_statistics.get(self._terminal.id)
+        if statistics is None:
+            return None
+        return getattr(statistics, self._statistic)
+
+
+class ChargingSessionPeakPowerSensor(ChargingSessionStatisticsSensor):
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.WATT
+    _statistic = 'peak_power'
+
+    def __init__(self, coordinator: EVDutyCoordinator, terminal: Terminal) -> None:
+        super().__init__(coordinator, terminal, 'Session Peak Power')
+
+
+class ChargingSessionAveragePowerSensor(ChargingSessionStatisticsSensor):
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.WATT
+    _attr_suggested_display_precision = 0
+    _statistic = 'average_power'
+
+    def __init__(self, coordinator: EVDutyCoordinator, terminal: Terminal) -> None:
+        super().__init__(coordinator, terminal, 'Session Average Power')
+
+
+class ChargingSessionPluggedAveragePowerSensor(ChargingSessionStatisticsSensor):
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+    _attr_suggested_display_precision = 2
+    _statistic = 'plugged_average_power'
+
+    def __init__(self, coordinator: EVDutyCoordinator, terminal: Terminal) -> None:
+        super().__init__(coordinator, terminal, 'Session Plugged Average Power')
+
+
+class ChargingSessionIdleDurationSensor(ChargingSessionStatisticsSensor):
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _statistic = 'idle_seconds'
+
+    def __init__(self, coordinator: EVDutyCoordinator, terminal: Terminal) -> None:
+        super().__init__(coordinator, terminal, 'Session Idle Duration')
+
+
+class EnergyRateSensor(ChargingSessionStatisticsSensor):
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_device_class = SensorDeviceClass.POWER
+    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+    _attr_suggested_display_precision = 2
+    _statistic = 'energy_rate'
+
+    def __init__(self, coordinator: EVDutyCoordinator, terminal: Terminal) -> None:
+        super().__init__(coordinator, terminal, 'Energy Rate')
 
 
 class WifiIpSensor(EVDutyTerminalDevice, SensorEntity):
@@ -189,7 +303,8 @@ class WifiSsidSensor(EVDutyTerminalDevice, SensorEntity):
         return self._terminal.network_info.wifi_ssid
 
 
-class WifiRssiSensor(EVDutyTerminalDevice, SensorEntity):
+class WifiRssiSensor(SignificantChangeSensor):
+    _significant_change_type = 'wifi_rssi'
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
     _attr_entity_category = EntityCategory.DIAGNOSTIC
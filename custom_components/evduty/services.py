@@ -0,0 +1,61 @@
+"""
+EVduty charging stations services
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+import voluptuous as vol
+from homeassistant.const import ATTR_DEVICE_ID
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .session_log import summarize
+
+SERVICE_QUERY_SESSIONS = 'query_sessions'
+ATTR_START = 'start'
+ATTR_END = 'end'
+
+QUERY_SESSIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Required(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+
+    async def async_query_sessions(call: ServiceCall) -> ServiceResponse:
+        start = _as_aware(call.data[ATTR_START])
+        end = _as_aware(call.data[ATTR_END])
+        terminal_ids = _terminal_ids(hass, call.data[ATTR_DEVICE_ID]) if ATTR_DEVICE_ID in call.data else None
+
+        terminals = {}
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            terminals.update(await hass.async_add_executor_job(coordinator.session_log.query, start, end, terminal_ids))
+        return summarize(terminals)
+
+    hass.services.async_register(DOMAIN, SERVICE_QUERY_SESSIONS, async_query_sessions, schema=QUERY_SESSIONS_SCHEMA, supports_response=SupportsResponse.ONLY)
+
+
+def _as_aware(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return value
+
+
+def _terminal_ids(hass: HomeAssistant, device_ids: list[str]) -> list[str]:
+    device_registry = dr.async_get(hass)
+    terminal_ids = []
+    for device_id in device_ids:
+        device = device_registry.async_get(device_id)
+        if device is None:
+            raise ServiceValidationError(f'Unknown device {device_id}')
+        terminal_ids += [identifier for domain, identifier in device.identifiers if domain == DOMAIN]
+    return terminal_ids
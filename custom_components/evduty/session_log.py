@@ -0,0 +1,107 @@
+"""
+EVduty completed charging sessions log, stored in SQLite
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    terminal_id TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    energy REAL NOT NULL,
+    cost REAL NOT NULL,
+    peak_power REAL NOT NULL,
+    PRIMARY KEY (terminal_id, start_time)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_start_time ON sessions (start_time);
+"""
+
+
+@dataclass(frozen=True)
+class LoggedSession:
+    terminal_id: str
+    start: datetime
+    end: datetime
+    energy: float
+    cost: float
+    peak_power: float
+
+
+class SessionLog:
+    """One row per completed session, indexed by terminal and start time.
+
+    Sessions are buffered and written in batches by flush, which like open, query and close is blocking and must run in the executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._pending: list[LoggedSession] = []
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def pending(self) -> bool:
+        return len(self._pending) > 0
+
+    def open(self) -> None:
+        with self._lock:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def add(self, session: LoggedSession) -> None:
+        with self._lock:
+            self._pending.append(session)
+
+    def flush(self) -> None:
+        """Write the pending sessions, they stay pending if the write fails."""
+        with self._lock:
+            if self._connection is None or not self._pending:
+                return
+            with self._connection:
+                self._connection.executemany('INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)',
+                                             [(s.terminal_id, s.start.timestamp(), s.end.timestamp(), s.energy, s.cost, s.peak_power) for s in self._pending])
+            self._pending = []
+
+    def query(self, start: datetime, end: datetime, terminal_ids: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        """Aggregates per terminal of the sessions started between start and end."""
+        sql = ('SELECT terminal_id, COUNT(*), SUM(energy), SUM(cost), SUM(end_time - start_time), MAX(peak_power) '
+               'FROM sessions WHERE start_time >= ? AND start_time < ?')
+        parameters: list[Any] = [start.timestamp(), end.timestamp()]
+        if terminal_ids is not None:
+            sql += f' AND terminal_id IN ({", ".join("?" * len(terminal_ids))})'
+            parameters += terminal_ids
+        sql += ' GROUP BY terminal_id'
+
+        self.flush()
+        with self._lock:
+            if self._connection is None:
+                return {}
+            rows = self._connection.execute(sql, parameters).fetchall()
+
+        return {terminal_id: {'sessions': sessions, 'energy': energy, 'cost': cost, 'duration': duration, 'peak_power': peak_power}
+                for terminal_id, sessions, energy, cost, duration, peak_power in rows}
+
+
+def summarize(terminals: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Totals over the per terminal aggregates returned by query."""
+    return {
+        'sessions': sum(t['sessions'] for t in terminals.values()),
+        'energy': sum(t['energy'] for t in terminals.values()),
+        'cost': sum(t['cost'] for t in terminals.values()),
+        'duration': sum(t['duration'] for t in terminals.values()),
+        'peak_power': max((t['peak_power'] for t in terminals.values()), default=0),
+        'terminals': terminals,
+    }
@@ -0,0 +1,53 @@
+"""
+EVduty charging stations sensors significant change policy
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Mapping
+
+from .const import CONF_ABSOLUTE_DEADBAND, CONF_RELATIVE_DEADBAND, CONF_MIN_INTERVAL
+
+# sensor type -> default absolute deadband, readings jittering less than this are noise
+SENSOR_TYPES = {
+    'volt': 1,
+    'amp': 0.5,
+    'power': 50,
+    'wifi_rssi': 3,
+}
+
+
+@dataclass(frozen=True)
+class SignificantChangePolicy:
+    """A new value is written when it moves past both deadbands and the last write is older than min_interval."""
+    absolute: float = 0
+    relative: float = 0
+    min_interval: timedelta = timedelta()
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any], sensor_type: str) -> SignificantChangePolicy:
+        return cls(absolute=options.get(option_key(sensor_type, CONF_ABSOLUTE_DEADBAND), SENSOR_TYPES[sensor_type]),
+                   relative=options.get(option_key(sensor_type, CONF_RELATIVE_DEADBAND), 0) / 100,
+                   min_interval=timedelta(seconds=options.get(option_key(sensor_type, CONF_MIN_INTERVAL), 0)))
+
+    def is_significant(self, previous: float | None, value: float | None) -> bool:
+        if previous is None or value is None:
+            return previous != value
+        change = abs(value - previous)
+        return change > 0 and change >= self.absolute and change >= abs(previous) * self.relative
+
+    def should_write(self, previous: float | None, previous_at: datetime | None, value: float | None, now: datetime) -> bool:
+        if previous_at is None:
+            return True
+        if now - previous_at < self.min_interval:
+            return False
+        return self.is_significant(previous, value)
+
+
+def option_key(sensor_type: str, option: str) -> str:
+    return f'{sensor_type}_{option}'
+
+
+def policies_from_options(options: Mapping[str, Any]) -> dict[str, SignificantChangePolicy]:
+    return {sensor_type: SignificantChangePolicy.from_options(options, sensor_type) for sensor_type in SENSOR_TYPES}
@@ -0,0 +1,143 @@
+"""
+EVduty charging session cost computed locally from a time-of-use tariff
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from itertools import pairwise
+from typing import Any, Mapping
+
+from homeassistant.const import CONF_CURRENCY
+from homeassistant.util import dt as dt_util
+
+from .const import CONF_ENERGY_RATE, CONF_TOU_SCHEDULE
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class TariffPeriod:
+    start: time
+    end: time
+    rate: float
+
+    def contains(self, seconds: int) -> bool:
+        start, end = _seconds_of_day(self.start), _seconds_of_day(self.end)
+        if start == end:
+            return True
+        if start < end:
+            return start <= seconds < end
+        return seconds >= start or seconds < end
+
+
+class Tariff:
+    """Daily time-of-use schedule, rates are per kWh."""
+
+    def __init__(self, currency: str, rate: float, periods: list[TariffPeriod] | None = None) -> None:
+        self.currency = currency
+        self.rate = rate
+        self.periods = periods or []
+
+        # flatten the schedule into contiguous segments so a lookup is a bisect
+        self._boundaries = sorted({0} | {_seconds_of_day(t) for p in self.periods for t in (p.start, p.end)})
+        self._rates = [self._rate_of_segment(boundary) for boundary in self._boundaries]
+
+    def __repr__(self) -> str:
+        return f"<Tariff currency:{self.currency} rate:{self.rate} periods:{len(self.periods)}>"
+
+    def __eq__(self, __value):
+        return (isinstance(__value, Tariff) and
+                self.currency == __value.currency and
+                self.rate == __value.rate and
+                self.periods == __value.periods)
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any], default_currency: str) -> Tariff | None:
+        if options.get(CONF_ENERGY_RATE) is None:
+            return None
+        return cls(currency=options.get(CONF_CURRENCY) or default_currency,
+                   rate=options[CONF_ENERGY_RATE],
+                   periods=parse_schedule(options.get(CONF_TOU_SCHEDULE, '')))
+
+    def rate_at(self, at: datetime) -> float:
+        return self._rates[bisect_right(self._boundaries, _seconds_of_day(dt_util.as_local(at))) - 1]
+
+    def interval_cost(self, start: datetime, end: datetime, energy: float) -> float:
+        """Cost of energy (kWh) drawn evenly between start and end, split across rate changes."""
+        if energy <= 0:
+            return 0
+        start, end = dt_util.as_local(start), dt_util.as_local(end)
+        if end <= start:
+            return energy * self.rate_at(end)
+
+        duration = (end - start).total_seconds()
+        cost = 0
+        current = start
+        while current < end:
+            seconds = _seconds_of_day(current)
+            index = bisect_right(self._boundaries, seconds) - 1
+            next_boundary = self._boundaries[index + 1] if index + 1 < len(self._boundaries) else SECONDS_PER_DAY
+            segment_end = min(end, current + timedelta(seconds=next_boundary - seconds, microseconds=-current.microsecond))
+            cost += energy * (segment_end - current).total_seconds() / duration * self._rates[index]
+            current = segment_end
+        return cost
+
+    def session_cost(self, samples: list[tuple[datetime, float]]) -> float:
+        """Cost of a whole session from its (time, cumulative Wh) samples, in a single pass."""
+        return sum(self.interval_cost(t0, t1, (e1 - e0) / 1000) for (t0, e0), (t1, e1) in pairwise(samples))
+
+    def _rate_of_segment(self, seconds: int) -> float:
+        rate = self.rate
+        for period in self.periods:
+            if period.contains(seconds):
+                rate = period.rate
+        return rate
+
+
+class SessionCostMeter:
+    """Accumulates the cost of a charging session as energy samples arrive."""
+
+    def __init__(self, start: datetime) -> None:
+        self.start = start
+        self.samples: list[tuple[datetime, float]] = [(start, 0)]
+        self.cost = 0
+
+    @property
+    def energy(self) -> float:
+        return self.samples[-1][1]
+
+    def add(self, at: datetime, energy: float, tariff: Tariff | None) -> None:
+        last_at, last_energy = self.samples[-1]
+        if at <= last_at:
+            return
+        energy = max(energy, last_energy)
+        self.samples.append((at, energy))
+        if tariff is not None:
+            self.cost += tariff.interval_cost(last_at, at, (energy - last_energy) / 1000)
+
+    def recompute(self, tariff: Tariff | None) -> None:
+        self.cost = tariff.session_cost(self.samples) if tariff is not None else 0
+
+
+def parse_schedule(schedule: str) -> list[TariffPeriod]:
+    """Parse a schedule like '07:00-11:00=0.15, 17:00-19:00=0.21'."""
+    periods = []
+    for item in schedule.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            hours, rate = item.split('=')
+            start, end = hours.split('-')
+            periods.append(TariffPeriod(start=time.fromisoformat(start.strip()),
+                                        end=time.fromisoformat(end.strip()),
+                                        rate=float(rate)))
+        except ValueError as error:
+            raise ValueError(f'Invalid time-of-use period: {item}') from error
+    return periods
+
+
+def _seconds_of_day(value: time | datetime) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from custom_components.evduty.analytics import SessionStatistics
+
+START = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+class TestSessionStatistics(TestCase):
+
+    def test_no_sample(self):
+        statistics = SessionStatistics(START)
+
+        self.assertEqual(statistics.peak_power, 0)
+        self.assertEqual(statistics.average_power, 0)
+        self.assertEqual(statistics.plugged_average_power, 0)
+        self.assertEqual(statistics.idle_seconds, 0)
+        self.assertEqual(statistics.energy_rate, 0)
+
+    def test_peak_power(self):
+        statistics = SessionStatistics(START)
+        statistics.add(at(1), 3600, 0)
+        statistics.add(at(2), 7200, 100)
+        statistics.add(at(3), 1200, 200)
+
+        self.assertEqual(statistics.peak_power, 7200)
+
+    def test_average_power_is_time_weighted_while_drawing(self):
+        statistics = SessionStatistics(START)
+        statistics.add(at(0), 6000, 0)
+        statistics.add(at(30), 0, 3000)
+        statistics.add(at(40), 3000, 3000)
+        statistics.add(at(50), 3000, 3500)
+
+        self.assertEqual(statistics.average_power, (6000 * 30 + 3000 * 10) / 40)
+
+    def test_average_power_before_second_sample_is_current_power(self):
+        statistics = SessionStatistics(START)
+        statistics.add(at(1), 3600, 0)
+
+        self.assertEqual(statistics.average_power, 3600)
+
+    def test_plugged_average_power(self):
+        statistics = SessionStatistics(START)
+        statistics.add(at(60), 0, 3000)
+        statistics.add(at(120), 0, 3000)
+
+        self.assertEqual(statistics.plugged_average_power, 1.5)
+
+    def test_idle_time_while_plugged_and_not_drawing(self):
+        statistics = SessionStatistics(START)
+        statistics.add(at(0), 6000, 0)
+        statistics.add(at(30), 0, 3000)
+        statistics.add(at(45), 0, 3000)
+        statistics.add(at(50), 6000, 3000)
+
+        self.assertEqual(statistics.idle_seconds, 20 * 60)
+        self.assertEqual(statistics.charging_seconds, 30 * 60)
+
+    def test_energy_rate_between_last_samples(self):
+        statistics = SessionStatistics(START)
+        statistics.add(at(0), 6000, 0)
+        statistics.add(at(30), 6000, 3000)
+        statistics.add(at(45), 6000, 4000)
+
+        self.assertEqual(statistics.energy_rate, 4)
+
+    def test_ignores_samples_out_of_order(self):
+        statistics = SessionStatistics(START)
+        statistics.add(at(30), 6000, 3000)
+        statistics.add(at(30), 9000, 4000)
+
+        self.assertEqual(statistics.peak_power, 6000)
+        self.assertEqual(statistics.energy, 3000)
@@ -1,12 +1,16 @@
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import patch, AsyncMock, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock, Mock
 
 from aiohttp import ClientSession
 from homeassistant.config_entries import ConfigEntry, ConfigEntries
-from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_USERNAME, CONF_PASSWORD, CONF_CURRENCY, CONF_HOST, CONF_PORT
+from homeassistant.core import HomeAssistant, Config
+from homeassistant.exceptions import ConfigEntryNotReady
 
-from custom_components.evduty import async_setup_entry, PLATFORMS, DOMAIN, EVDutyCoordinator
+from custom_components.evduty import async_setup_entry, async_unload_entry, PLATFORMS, DOMAIN, EVDutyCoordinator, UNLOADED_COORDINATORS, UNLOADED_COORDINATOR_TIMEOUT
+from custom_components.evduty.const import CONF_ENERGY_RATE, CONF_OCPP_PASSWORD, CONF_ID_TAGS
+from custom_components.evduty.significant_change import SignificantChangePolicy
+from custom_components.evduty.tariff import Tariff
 
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
@@ -50,6 +54,145 @@ class AsyncSetupEntryTest(IsolatedAsyncioTestCase):
         self.assertIsInstance(hass.data[DOMAIN]['entry'], EVDutyCoordinator)
         evduty_api.async_get_stations.assert_called_once()
 
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_creates_the_coordinator_tariff_from_options(self, async_get_clientsession_constructor, evduty_api_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        entry.options = {CONF_ENERGY_RATE: 0.1}
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        self.assertEqual(hass.data[DOMAIN]['entry'].tariff, Tariff(currency='CAD', rate=0.1))
+
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_sets_the_coordinator_currency_without_tariff(self, async_get_clientsession_constructor, evduty_api_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        entry.options = {CONF_CURRENCY: 'EUR'}
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        self.assertIsNone(hass.data[DOMAIN]['entry'].tariff)
+        self.assertEqual(hass.data[DOMAIN]['entry'].currency, 'EUR')
+
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_defaults_the_coordinator_currency(self, async_get_clientsession_constructor, evduty_api_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        self.assertEqual(hass.data[DOMAIN]['entry'].currency, 'CAD')
+
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_creates_the_coordinator_significant_change_policies_from_options(self, async_get_clientsession_constructor, evduty_api_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        entry.options = {'volt_absolute_deadband': 2}
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        self.assertEqual(hass.data[DOMAIN]['entry'].significant_change_policies['volt'], SignificantChangePolicy(absolute=2))
+
+    @patch('custom_components.evduty.OcppCentralSystem')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_starts_the_ocpp_central_system_when_port_configured(self, async_get_clientsession_constructor, evduty_api_constructor, central_system_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        central_system = AsyncMock()
+        central_system_constructor.return_value = central_system
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        entry.options = {CONF_HOST: '192.168.1.2', CONF_PORT: 9000, CONF_OCPP_PASSWORD: 'secret', CONF_ID_TAGS: 'tag1, tag2'}
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        central_system_constructor.assert_called_once_with(hass.data[DOMAIN]['entry'], 9000, 'secret', '192.168.1.2', frozenset({'tag1', 'tag2'}))
+        central_system.async_start.assert_called_once()
+        self.assertEqual(hass.data[DOMAIN]['entry'].central_system, central_system)
+
+    @patch('custom_components.evduty.OcppCentralSystem')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_does_not_start_the_ocpp_central_system_by_default(self, async_get_clientsession_constructor, evduty_api_constructor, central_system_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock()
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        central_system_constructor.assert_not_called()
+
+    @patch('custom_components.evduty.OcppCentralSystem')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_does_not_start_the_ocpp_central_system_without_password(self, async_get_clientsession_constructor, evduty_api_constructor, central_system_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock()
+        entry.options = {CONF_PORT: 9000}
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        central_system_constructor.assert_not_called()
+
+    @patch('custom_components.evduty.SessionLog')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_first_refresh_failure_closes_the_session_log(self, async_get_clientsession_constructor, evduty_api_constructor, session_log_constructor):
+        evduty_api = self.evduty_api_mock(evduty_api_constructor)
+        evduty_api.async_get_stations.side_effect = ConnectionError()
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+
+        with self.assertRaises(ConfigEntryNotReady), self.assertLogs(level='ERROR'):
+            await async_setup_entry(hass=hass, entry=entry)
+
+        self.assertNotIn('entry', hass.data[DOMAIN])
+        hass.async_add_executor_job.assert_called_with(session_log_constructor.return_value.close)
+
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_opens_the_session_log(self, async_get_clientsession_constructor, evduty_api_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        session_log = hass.data[DOMAIN]['entry'].session_log
+        hass.config.path.assert_called_once_with('.storage', 'evduty_entry.db')
+        hass.async_add_executor_job.assert_any_call(session_log.open)
+
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_listens_to_options_updates(self, async_get_clientsession_constructor, evduty_api_constructor):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock()
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        entry.add_update_listener.assert_called_once()
+
     @patch('custom_components.evduty.EVDutyApi')
     @patch('custom_components.evduty.async_get_clientsession')
     async def test_returns_true(self, async_get_clientsession_constructor, evduty_api_constructor):
@@ -61,6 +204,95 @@ class AsyncSetupEntryTest(IsolatedAsyncioTestCase):
         result = await async_setup_entry(hass=hass, entry=entry)
         self.assertTrue(result)
 
+    @patch('custom_components.evduty.async_call_later')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_unload_shuts_the_coordinator_down(self, async_get_clientsession_constructor, evduty_api_constructor, async_call_later):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        await async_setup_entry(hass=hass, entry=entry)
+        coordinator = hass.data[DOMAIN]['entry']
+
+        result = await async_unload_entry(hass=hass, entry=entry)
+
+        self.assertTrue(result)
+        self.assertNotIn('entry', hass.data[DOMAIN])
+        self.assertTrue(coordinator._shutdown_requested)
+        hass.async_add_executor_job.assert_any_call(coordinator.session_log.close)
+
+    @patch('custom_components.evduty.async_call_later')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_reload_restores_the_last_data_and_api(self, async_get_clientsession_constructor, evduty_api_constructor, async_call_later):
+        evduty_api = self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        await async_setup_entry(hass=hass, entry=entry)
+        previous = hass.data[DOMAIN]['entry']
+        await async_unload_entry(hass=hass, entry=entry)
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        coordinator = hass.data[DOMAIN]['entry']
+        self.assertIsNot(coordinator, previous)
+        self.assertIs(coordinator.api, previous.api)
+        self.assertEqual(coordinator.data, previous.data)
+        evduty_api_constructor.assert_called_once()
+        evduty_api.async_get_stations.assert_called_once()
+
+    @patch('custom_components.evduty.async_call_later')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_reload_with_new_credentials_starts_fresh(self, async_get_clientsession_constructor, evduty_api_constructor, async_call_later):
+        evduty_api = self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry', password='old')
+        await async_setup_entry(hass=hass, entry=entry)
+        await async_unload_entry(hass=hass, entry=entry)
+        entry.data = {CONF_USERNAME: 'u', CONF_PASSWORD: 'new'}
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        self.assertEqual(evduty_api_constructor.call_count, 2)
+        self.assertEqual(evduty_api.async_get_stations.call_count, 2)
+
+    @patch('custom_components.evduty.async_call_later')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_reload_cancels_the_unloaded_coordinator_eviction(self, async_get_clientsession_constructor, evduty_api_constructor, async_call_later):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        await async_setup_entry(hass=hass, entry=entry)
+        await async_unload_entry(hass=hass, entry=entry)
+
+        await async_setup_entry(hass=hass, entry=entry)
+
+        async_call_later.return_value.assert_called_once()
+
+    @patch('custom_components.evduty.async_call_later')
+    @patch('custom_components.evduty.EVDutyApi')
+    @patch('custom_components.evduty.async_get_clientsession')
+    async def test_evicts_the_unloaded_coordinator_after_the_timeout(self, async_get_clientsession_constructor, evduty_api_constructor, async_call_later):
+        self.evduty_api_mock(evduty_api_constructor)
+        self.async_get_client_session_mock(async_get_clientsession_constructor)
+        hass = self.hass_mock()
+        entry = self.entry_mock(id='entry')
+        await async_setup_entry(hass=hass, entry=entry)
+        await async_unload_entry(hass=hass, entry=entry)
+        self.assertIn('entry', hass.data[UNLOADED_COORDINATORS])
+
+        _, delay, evict = async_call_later.call_args.args
+        evict(None)
+
+        self.assertEqual(delay, UNLOADED_COORDINATOR_TIMEOUT)
+        self.assertNotIn('entry', hass.data[UNLOADED_COORDINATORS])
+
     @staticmethod
     def async_get_client_session_mock(async_get_clientsession_constructor):
         async_get_clientsession = MagicMock()
@@ -73,19 +305,30 @@ class AsyncSetupEntryTest(IsolatedAsyncioTestCase):
         entry = AsyncMock(ConfigEntry)
         entry.entry_id = id
         entry.data = {CONF_USERNAME: username, CONF_PASSWORD: password}
+        entry.options = {}
         return entry
 
     @staticmethod
     def hass_mock():
         hass = AsyncMock(HomeAssistant)
         hass.data = {}
+        hass.config = Mock(Config)
+        hass.config.currency = 'CAD'
+        hass.async_add_executor_job = AsyncMock()
         hass.config_entries = AsyncMock(ConfigEntries)
+        hass.config_entries.async_unload_platforms.return_value = True
         return hass
 
     @staticmethod
     def evduty_api_mock(evduty_api_constructor):
         evduty_api = AsyncMock()
-        evduty_api_constructor.return_value = evduty_api
+
+        def create_evduty_api(username, password, session):
+            evduty_api.username = username
+            evduty_api.password = password
+            return evduty_api
+
+        evduty_api_constructor.side_effect = create_evduty_api
         async_get_stations = AsyncMock(return_value=[])
         evduty_api.async_get_stations = async_get_stations
         return evduty_api
@@ -2,15 +2,19 @@ from http import HTTPStatus
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, patch, Mock, MagicMock
 
+import voluptuous as vol
 from aiohttp import RequestInfo, ClientSession
 from evdutyapi import EVDutyApiInvalidCredentialsError
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntries
-from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.const import CONF_USERNAME, CONF_PASSWORD, CONF_CURRENCY, CONF_PORT
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers.selector import TextSelectorType
 
 from custom_components.evduty import DOMAIN
+from custom_components.evduty.config_flow import EVDutyConfigFlow
+from custom_components.evduty.const import CONF_ENERGY_RATE, CONF_TOU_SCHEDULE, CONF_OCPP_PASSWORD
 
 
 class ConfigFlowTest(IsolatedAsyncioTestCase):
@@ -91,6 +95,91 @@ class ConfigFlowTest(IsolatedAsyncioTestCase):
         self.assertEqual(result['type'], FlowResultType.CREATE_ENTRY)
         self.assertEqual(result['context'], {'source': 'reauth', 'entry_id': 'id', 'unique_id': 'test-username'})
 
+    async def test_options_form_saves_tariff(self):
+        flow = self.options_flow_setup()
+
+        result = await flow.async_step_init({CONF_CURRENCY: 'CAD', CONF_ENERGY_RATE: 0.1, CONF_TOU_SCHEDULE: '07:00-11:00=0.2'})
+        self.assertEqual(result['type'], FlowResultType.FORM)
+        self.assertEqual(result['step_id'], 'significant_change')
+
+        result = await flow.async_step_significant_change({})
+
+        self.assertEqual(result['type'], FlowResultType.CREATE_ENTRY)
+        self.assertEqual(result['data'], {CONF_CURRENCY: 'CAD', CONF_ENERGY_RATE: 0.1, CONF_TOU_SCHEDULE: '07:00-11:00=0.2'})
+
+    async def test_options_form_clears_energy_rate(self):
+        flow = self.options_flow_setup(options={CONF_CURRENCY: 'CAD', CONF_ENERGY_RATE: 0.1})
+
+        await flow.async_step_init({CONF_CURRENCY: 'CAD', CONF_TOU_SCHEDULE: ''})
+        result = await flow.async_step_significant_change({})
+
+        self.assertNotIn(CONF_ENERGY_RATE, result['data'])
+
+    async def test_options_form_saves_significant_change_policies(self):
+        flow = self.options_flow_setup()
+
+        await flow.async_step_init({CONF_CURRENCY: 'CAD', CONF_TOU_SCHEDULE: ''})
+        result = await flow.async_step_significant_change({'volt_absolute_deadband': 2, 'volt_relative_deadband': 1, 'volt_min_interval': 300})
+
+        self.assertEqual(result['type'], FlowResultType.CREATE_ENTRY)
+        self.assertEqual(result['data'], {CONF_CURRENCY: 'CAD', CONF_TOU_SCHEDULE: '', 'volt_absolute_deadband': 2, 'volt_relative_deadband': 1, 'volt_min_interval': 300})
+
+    async def test_options_form_invalid_schedule(self):
+        flow = self.options_flow_setup()
+
+        result = await flow.async_step_init({CONF_CURRENCY: 'CAD', CONF_ENERGY_RATE: 0.1, CONF_TOU_SCHEDULE: 'peak'})
+
+        self.assertEqual(result['type'], FlowResultType.FORM)
+        self.assertEqual(result['errors'], {CONF_TOU_SCHEDULE: 'invalid_schedule'})
+
+    async def test_options_form_requires_energy_rate_with_schedule(self):
+        flow = self.options_flow_setup()
+
+        result = await flow.async_step_init({CONF_CURRENCY: 'CAD', CONF_TOU_SCHEDULE: '07:00-11:00=0.2'})
+
+        self.assertEqual(result['type'], FlowResultType.FORM)
+        self.assertEqual(result['errors'], {CONF_ENERGY_RATE: 'energy_rate_required'})
+
+    async def test_options_form_requires_ocpp_password_with_port(self):
+        flow = self.options_flow_setup()
+
+        result = await flow.async_step_init({CONF_CURRENCY: 'CAD', CONF_TOU_SCHEDULE: '', CONF_PORT: 9000})
+
+        self.assertEqual(result['type'], FlowResultType.FORM)
+        self.assertEqual(result['errors'], {CONF_OCPP_PASSWORD: 'password_required'})
+
+    async def test_options_form_saves_ocpp_settings(self):
+        flow = self.options_flow_setup()
+
+        await flow.async_step_init({CONF_CURRENCY: 'CAD', CONF_TOU_SCHEDULE: '', CONF_PORT: 9000, CONF_OCPP_PASSWORD: 'secret'})
+        result = await flow.async_step_significant_change({})
+
+        self.assertEqual(result['data'], {CONF_CURRENCY: 'CAD', CONF_TOU_SCHEDULE: '', CONF_PORT: 9000, CONF_OCPP_PASSWORD: 'secret'})
+
+    async def test_options_form_hides_ocpp_password(self):
+        flow = self.options_flow_setup()
+        schema = flow._options_schema()
+
+        password = next(value for key, value in schema.schema.items() if key == CONF_OCPP_PASSWORD)
+
+        self.assertEqual(password.config['type'], TextSelectorType.PASSWORD)
+
+    async def test_options_form_validates_currency(self):
+        flow = self.options_flow_setup()
+        schema = flow._options_schema()
+
+        self.assertEqual(schema({CONF_CURRENCY: 'EUR'})[CONF_CURRENCY], 'EUR')
+        with self.assertRaises(vol.Invalid):
+            schema({CONF_CURRENCY: 'dollars'})
+
+    @staticmethod
+    def options_flow_setup(options=None):
+        entry = Mock(config_entries.ConfigEntry)
+        entry.options = options or {}
+        flow = EVDutyConfigFlow.async_get_options_flow(entry)
+        flow.hass = HomeAssistant(".")
+        return flow
+
     @staticmethod
     def hass_setup():
         hass = HomeAssistant(".")
@@ -1,14 +1,19 @@
-from datetime import timedelta
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import Mock, AsyncMock
 
 from aiohttp import RequestInfo
-from evdutyapi import EVDutyApi, Station, Terminal, EVDutyApiInvalidCredentialsError, EVDutyApiError
+from evdutyapi import EVDutyApi, Station, Terminal, ChargingSession, ChargingStatus, EVDutyApiInvalidCredentialsError, EVDutyApiError
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed
 
 from custom_components.evduty import EVDutyCoordinator, DOMAIN
+from custom_components.evduty.const import LOGGER
+from custom_components.evduty.session_log import SessionLog, LoggedSession
+from custom_components.evduty.tariff import Tariff
 
 
 class TestEVDutyCoordinator(IsolatedAsyncioTestCase):
@@ -33,8 +38,7 @@ class TestEVDutyCoordinator(IsolatedAsyncioTestCase):
         coordinator = EVDutyCoordinator(hass=hass, api=api)
 
         station = Mock(Station)
-        terminal = Mock(Terminal)
-        terminal.id = "123"
+        terminal = self.terminal(start_date=datetime(2024, 1, 15, 10, tzinfo=timezone.utc))
         station.terminals = [terminal]
         api.async_get_stations = AsyncMock(return_value=[station])
 
@@ -74,3 +78,217 @@ class TestEVDutyCoordinator(IsolatedAsyncioTestCase):
 
         with self.assertRaises(ConnectionError):
             await coordinator._async_update_data()
+
+    async def test_records_session_cost_on_update(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api, tariff=Tariff(currency='CAD', rate=0.1))
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+        coordinator.data = {'123': self.terminal(start_date=start, energy_consumed=1000)}
+
+        coordinator._record_samples(coordinator.data, start + timedelta(hours=1))
+        coordinator.data = {'123': self.terminal(start_date=start, energy_consumed=3000)}
+        coordinator._record_samples(coordinator.data, start + timedelta(hours=2))
+
+        self.assertAlmostEqual(coordinator.cost_meters['123'].cost, 0.3)
+
+    async def test_resets_session_cost_when_session_ends(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+        coordinator._record_samples({'123': self.terminal(start_date=start, energy_consumed=1000)}, start + timedelta(hours=1))
+        coordinator._record_samples({'123': self.terminal(is_active=False)}, start + timedelta(hours=2))
+
+        self.assertEqual(coordinator.cost_meters, {})
+
+    async def test_recomputes_session_cost_on_tariff_change(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+        coordinator._record_samples({'123': self.terminal(start_date=start, energy_consumed=2000)}, start + timedelta(hours=1))
+
+        coordinator.set_tariff(Tariff(currency='CAD', rate=0.5))
+
+        self.assertAlmostEqual(coordinator.cost_meters['123'].cost, 1)
+
+    async def test_records_session_statistics_on_update(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+        coordinator._record_samples({'123': self.terminal(start_date=start, power=7200, energy_consumed=0)}, start + timedelta(hours=1))
+        coordinator._record_samples({'123': self.terminal(start_date=start, power=3600, energy_consumed=7200)}, start + timedelta(hours=2))
+
+        statistics = coordinator.session_statistics['123']
+        self.assertEqual(statistics.peak_power, 7200)
+        self.assertEqual(statistics.energy_rate, 7.2)
+
+    async def test_resets_session_statistics_on_new_session(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+        coordinator._record_samples({'123': self.terminal(start_date=start, power=7200)}, start + timedelta(hours=1))
+        coordinator._record_samples({'123': self.terminal(start_date=start + timedelta(hours=2), power=3600)}, start + timedelta(hours=3))
+
+        self.assertEqual(coordinator.session_statistics['123'].peak_power, 3600)
+
+    async def test_logs_session_when_it_ends(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        session_log = Mock(SessionLog)
+        coordinator = EVDutyCoordinator(hass=hass, api=api, tariff=Tariff(currency='CAD', rate=0.1), session_log=session_log)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+        coordinator._record_samples({'123': self.terminal(start_date=start, power=7200, energy_consumed=7200)}, start + timedelta(hours=1))
+        coordinator._record_samples({'123': self.terminal(start_date=start, power=0, energy_consumed=10000)}, start + timedelta(hours=2))
+        session_log.add.assert_not_called()
+        coordinator._record_samples({'123': self.terminal(is_active=False)}, start + timedelta(hours=3))
+
+        session_log.add.assert_called_once_with(LoggedSession(terminal_id='123', start=start, end=start + timedelta(hours=2), energy=10, cost=1, peak_power=7200))
+
+    async def test_logs_session_when_a_new_one_starts(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        session_log = Mock(SessionLog)
+        coordinator = EVDutyCoordinator(hass=hass, api=api, session_log=session_log)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+        coordinator._record_samples({'123': self.terminal(start_date=start)}, start + timedelta(hours=1))
+        coordinator._record_samples({'123': self.terminal(start_date=start + timedelta(hours=2))}, start + timedelta(hours=3))
+
+        session_log.add.assert_called_once()
+        self.assertEqual(session_log.add.call_args.args[0].start, start)
+
+    async def test_flushes_session_log_in_a_background_task(self):
+        hass = Mock(HomeAssistant)
+        tasks = []
+        hass.async_create_background_task = Mock(side_effect=lambda target, name: tasks.append(asyncio.create_task(target)))
+        hass.async_add_executor_job = AsyncMock()
+        session_log = Mock(SessionLog)
+        session_log.pending = True
+        coordinator = EVDutyCoordinator(hass=hass, api=Mock(EVDutyApi), session_log=session_log)
+
+        coordinator.async_update_listeners()
+        await asyncio.gather(*tasks)
+
+        hass.async_add_executor_job.assert_called_once_with(session_log.flush)
+
+    async def test_logs_session_log_flush_failure(self):
+        hass = Mock(HomeAssistant)
+        tasks = []
+        hass.async_create_background_task = Mock(side_effect=lambda target, name: tasks.append(asyncio.create_task(target)))
+        hass.async_add_executor_job = AsyncMock(side_effect=sqlite3.OperationalError('disk I/O error'))
+        session_log = Mock(SessionLog)
+        session_log.pending = True
+        coordinator = EVDutyCoordinator(hass=hass, api=Mock(EVDutyApi), session_log=session_log)
+
+        with self.assertLogs(LOGGER, 'ERROR'):
+            coordinator.async_update_listeners()
+            await asyncio.gather(*tasks)
+
+    async def test_shutdown_cancels_refresh_in_flight_and_returns_last_data(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        previous_data = {"123": 'anything'}
+        coordinator.data = previous_data
+        fetching = asyncio.Event()
+
+        async def async_get_stations():
+            fetching.set()
+            await asyncio.sleep(10)
+
+        api.async_get_stations = async_get_stations
+        refresh = asyncio.create_task(coordinator._async_update_data())
+        await fetching.wait()
+
+        await coordinator.async_shutdown()
+
+        self.assertTrue(refresh.done())
+        self.assertEqual(refresh.result(), previous_data)
+
+    async def test_cancelling_the_refresh_caller_is_not_swallowed(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        fetching = asyncio.Event()
+
+        async def async_get_stations():
+            fetching.set()
+            await asyncio.sleep(10)
+
+        api.async_get_stations = async_get_stations
+        refresh = asyncio.create_task(coordinator._async_update_data())
+        await fetching.wait()
+
+        refresh.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await refresh
+
+    async def test_records_samples_when_new_data_is_fetched(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        station = Mock(Station)
+        station.terminals = [self.terminal(start_date=datetime(2024, 1, 15, 10, tzinfo=timezone.utc), energy_consumed=1000)]
+        api.async_get_stations = AsyncMock(return_value=[station])
+
+        await coordinator._async_update_data()
+
+        self.assertEqual(coordinator.cost_meters['123'].energy, 1000)
+
+    async def test_does_not_record_samples_when_listeners_are_notified_without_new_data(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+        coordinator.data = {'123': self.terminal(start_date=start, energy_consumed=1000)}
+        coordinator._record_samples(coordinator.data, start + timedelta(hours=1))
+
+        coordinator.async_update_listeners()
+
+        self.assertEqual(len(coordinator.cost_meters['123'].samples), 2)
+
+    async def test_does_not_record_samples_when_returning_last_data(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        coordinator = EVDutyCoordinator(hass=hass, api=api)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+        coordinator.data = {'123': self.terminal(start_date=start, energy_consumed=1000)}
+        coordinator._record_samples(coordinator.data, start + timedelta(hours=1))
+        api.async_get_stations.side_effect = EVDutyApiError(status=HTTPStatus.UNAUTHORIZED, request_info=Mock(RequestInfo), history=())
+
+        await coordinator._async_update_data()
+
+        self.assertEqual(len(coordinator.cost_meters['123'].samples), 2)
+
+    async def test_restore_continues_from_previous_coordinator(self):
+        hass = Mock(HomeAssistant)
+        api = Mock(EVDutyApi)
+        previous = EVDutyCoordinator(hass=hass, api=api)
+        start = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+        previous.data = {'123': self.terminal(start_date=start, power=7200, energy_consumed=2000)}
+        previous._record_samples(previous.data, start + timedelta(hours=1))
+        coordinator = EVDutyCoordinator(hass=hass, api=api, tariff=Tariff(currency='CAD', rate=0.5))
+
+        coordinator.restore(previous)
+
+        self.assertEqual(coordinator.data, previous.data)
+        self.assertEqual(coordinator.session_statistics['123'].peak_power, 7200)
+        self.assertAlmostEqual(coordinator.cost_meters['123'].cost, 1)
+
+    @staticmethod
+    def terminal(is_active=True, start_date=datetime.min, power=0, energy_consumed=0):
+        session = ChargingSession.no_session()
+        session.is_active = is_active
+        session.power = power
+        session.start_date = start_date
+        session.energy_consumed = energy_consumed
+        return Terminal(id='123', name='Test', status=ChargingStatus.in_use, charge_box_identity='A', firmware_version='1.2.3', session=session)
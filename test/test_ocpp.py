@@ -0,0 +1,212 @@
+import json
+from datetime import datetime, timedelta
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import Mock
+
+from aiohttp import BasicAuth, ClientSession, WSServerHandshakeError
+from evdutyapi import EVDutyApi, Terminal, ChargingStatus, ChargingSession, NetworkInfo
+from homeassistant.core import HomeAssistant
+
+from custom_components.evduty import EVDutyCoordinator
+from custom_components.evduty.ocpp import OcppCentralSystem
+
+
+class TestOcppCentralSystem(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.coordinator = EVDutyCoordinator(hass=Mock(HomeAssistant), api=Mock(EVDutyApi))
+        self.terminal = Terminal(id='123',
+                                 name='Test',
+                                 status=ChargingStatus.available,
+                                 charge_box_identity='A',
+                                 firmware_version='1.2.3',
+                                 session=ChargingSession.no_session(),
+                                 network_info=NetworkInfo(wifi_ssid="ssid", wifi_rssi=-72, ip_address="ip", mac_address="mac"))
+        self.coordinator.data = {'123': self.terminal}
+
+        self.central_system = OcppCentralSystem(self.coordinator, port=0, password='secret', host='127.0.0.1', id_tags=frozenset({'tag'}))
+        await self.central_system.async_start()
+        self.url = f'http://127.0.0.1:{self.central_system.addresses[0][1]}/ocpp'
+        self.session = ClientSession()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.central_system.async_stop()
+
+    async def test_accepts_boot_notification(self):
+        async with self.connect() as charge_point:
+            self.assertEqual(charge_point.protocol, 'ocpp1.6')
+
+            response = await self.call(charge_point, 'BootNotification', {'chargePointVendor': 'EVduty', 'chargePointModel': 'Smart'})
+
+            self.assertEqual(response[0], 3)
+            self.assertEqual(response[2]['status'], 'Accepted')
+
+    async def test_listens_on_the_configured_host(self):
+        self.assertEqual([address[0] for address in self.central_system.addresses], ['127.0.0.1'])
+
+    async def test_rejects_charge_point_without_credentials(self):
+        with self.assertRaises(WSServerHandshakeError) as context:
+            await self.session.ws_connect(f'{self.url}/A', protocols=('ocpp1.6',))
+
+        self.assertEqual(context.exception.status, 401)
+
+    async def test_rejects_charge_point_with_invalid_password(self):
+        with self.assertRaises(WSServerHandshakeError) as context:
+            await self.session.ws_connect(f'{self.url}/A', protocols=('ocpp1.6',), auth=BasicAuth('A', 'wrong'))
+
+        self.assertEqual(context.exception.status, 401)
+
+    async def test_rejects_credentials_of_another_charge_point(self):
+        with self.assertRaises(WSServerHandshakeError) as context:
+            await self.session.ws_connect(f'{self.url}/A', protocols=('ocpp1.6',), auth=BasicAuth('B', 'secret'))
+
+        self.assertEqual(context.exception.status, 401)
+
+    async def test_authorizes_only_configured_id_tags(self):
+        async with self.connect() as charge_point:
+            accepted = await self.call(charge_point, 'Authorize', {'idTag': 'tag'})
+            rejected = await self.call(charge_point, 'Authorize', {'idTag': 'other'})
+
+            self.assertEqual(accepted[2], {'idTagInfo': {'status': 'Accepted'}})
+            self.assertEqual(rejected[2], {'idTagInfo': {'status': 'Invalid'}})
+
+    async def test_rejects_transaction_of_unknown_id_tag(self):
+        async with self.connect() as charge_point:
+            response = await self.call(charge_point, 'StartTransaction', {'connectorId': 1, 'idTag': 'other', 'meterStart': 0, 'timestamp': '2024-01-15T10:00:00Z'})
+
+            self.assertEqual(response[2]['idTagInfo'], {'status': 'Invalid'})
+
+    async def test_accepts_every_id_tag_without_configured_id_tags(self):
+        self.central_system.id_tags = frozenset()
+        async with self.connect() as charge_point:
+            authorize = await self.call(charge_point, 'Authorize', {'idTag': 'other'})
+            transaction = await self.call(charge_point, 'StartTransaction', {'connectorId': 1, 'idTag': 'other', 'meterStart': 0, 'timestamp': '2024-01-15T10:00:00Z'})
+
+            self.assertEqual(authorize[2], {'idTagInfo': {'status': 'Accepted'}})
+            self.assertEqual(transaction[2]['idTagInfo'], {'status': 'Accepted'})
+
+    async def test_rejects_unknown_charge_point(self):
+        with self.assertRaises(WSServerHandshakeError):
+            await self.session.ws_connect(f'{self.url}/unknown', protocols=('ocpp1.6',), auth=BasicAuth('unknown', 'secret'))
+
+    async def test_pushes_status_notification(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'StatusNotification', {'connectorId': 1, 'errorCode': 'NoError', 'status': 'Charging'})
+
+            self.assertEqual(self.coordinator.data['123'].status, ChargingStatus.in_use)
+
+    async def test_ignores_main_controller_available_status(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'StatusNotification', {'connectorId': 1, 'errorCode': 'NoError', 'status': 'Charging'})
+            await self.call(charge_point, 'StatusNotification', {'connectorId': 0, 'errorCode': 'NoError', 'status': 'Available'})
+
+            self.assertEqual(self.coordinator.data['123'].status, ChargingStatus.in_use)
+
+    async def test_pushes_main_controller_fault(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'StatusNotification', {'connectorId': 1, 'errorCode': 'NoError', 'status': 'Charging'})
+            await self.call(charge_point, 'StatusNotification', {'connectorId': 0, 'errorCode': 'GroundFailure', 'status': 'Faulted'})
+
+            self.assertEqual(self.coordinator.data['123'].status, ChargingStatus.out_of_service)
+
+    async def test_ignores_main_meter_values(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'MeterValues', {'connectorId': 0, 'meterValue': [{
+                'timestamp': '2024-01-15T10:01:00Z',
+                'sampledValue': [{'value': '7.2', 'measurand': 'Power.Active.Import', 'unit': 'kW'}]}]})
+
+            self.assertEqual(self.coordinator.data['123'].session.power, self.terminal.session.power)
+
+    async def test_pushes_meter_values_of_the_transaction(self):
+        async with self.connect() as charge_point:
+            response = await self.call(charge_point, 'StartTransaction', {'connectorId': 1, 'idTag': 'tag', 'meterStart': 1000, 'timestamp': '2024-01-15T10:00:00Z'})
+            self.assertIn('transactionId', response[2])
+
+            await self.call(charge_point, 'MeterValues', {'connectorId': 1, 'transactionId': response[2]['transactionId'], 'meterValue': [{
+                'timestamp': '2024-01-15T10:01:00Z',
+                'sampledValue': [
+                    {'value': '1.5', 'measurand': 'Energy.Active.Import.Register', 'unit': 'kWh'},
+                    {'value': '7.2', 'measurand': 'Power.Active.Import', 'unit': 'kW'},
+                    {'value': '30', 'measurand': 'Current.Import', 'unit': 'A'},
+                    {'value': '240', 'measurand': 'Voltage', 'unit': 'V'},
+                ]}]})
+
+            session = self.coordinator.data['123'].session
+            self.assertEqual(session.energy_consumed, 500)
+            self.assertEqual(session.power, 7200)
+            self.assertEqual(session.amp, 30)
+            self.assertEqual(session.volt, 240)
+
+    async def test_keeps_cloud_fields_not_provided_by_ocpp(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'MeterValues', {'connectorId': 1, 'meterValue': [{
+                'timestamp': '2024-01-15T10:01:00Z',
+                'sampledValue': [{'value': '240', 'measurand': 'Voltage'}]}]})
+
+            terminal = self.coordinator.data['123']
+            self.assertEqual(terminal.session.volt, 240)
+            self.assertEqual(terminal.network_info, self.terminal.network_info)
+            self.assertEqual(terminal.status, ChargingStatus.available)
+
+    async def test_pushes_line_to_line_voltage(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'MeterValues', {'connectorId': 1, 'meterValue': [{
+                'timestamp': '2024-01-15T10:01:00Z',
+                'sampledValue': [
+                    {'value': '240', 'measurand': 'Voltage', 'phase': 'L1-L2', 'unit': 'V'},
+                    {'value': '30', 'measurand': 'Current.Import', 'phase': 'L1', 'unit': 'A'},
+                    {'value': '29', 'measurand': 'Current.Import', 'phase': 'L2', 'unit': 'A'},
+                ]}]})
+
+            session = self.coordinator.data['123'].session
+            self.assertEqual(session.volt, 240)
+            self.assertEqual(session.amp, 30)
+
+    async def test_local_reading_overrides_next_cloud_refresh(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'StatusNotification', {'connectorId': 1, 'errorCode': 'NoError', 'status': 'Faulted'})
+
+            terminals = self.coordinator._apply_local_readings({'123': self.terminal})
+
+            self.assertEqual(terminals['123'].status, ChargingStatus.out_of_service)
+
+    async def test_expired_local_reading_falls_back_to_cloud(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'StatusNotification', {'connectorId': 1, 'errorCode': 'NoError', 'status': 'Faulted'})
+            self.coordinator.local_readings['123'].updated_at = datetime.now().astimezone() - timedelta(minutes=10)
+
+            terminals = self.coordinator._apply_local_readings({'123': self.terminal})
+
+            self.assertEqual(terminals['123'].status, ChargingStatus.available)
+
+    async def test_forgets_local_reading_on_disconnect(self):
+        async with self.connect() as charge_point:
+            await self.call(charge_point, 'Heartbeat', {})
+            self.assertIn('123', self.coordinator.local_readings)
+
+        await self.central_system.async_stop()
+
+        self.assertEqual(self.coordinator.local_readings, {})
+
+    async def test_replies_not_implemented_to_unsupported_action(self):
+        async with self.connect() as charge_point:
+            response = await self.call(charge_point, 'DataTransfer', {'vendorId': 'EVduty'})
+
+            self.assertEqual(response[0], 4)
+            self.assertEqual(response[2], 'NotImplemented')
+
+    async def test_replies_formation_violation_to_invalid_payload(self):
+        async with self.connect() as charge_point:
+            response = await self.call(charge_point, 'StatusNotification', {'connectorId': 1})
+
+            self.assertEqual(response[0], 4)
+            self.assertEqual(response[2], 'FormationViolation')
+
+    def connect(self):
+        return self.session.ws_connect(f'{self.url}/A', protocols=('ocpp1.6',), auth=BasicAuth('A', 'secret'))
+
+    @staticmethod
+    async def call(charge_point, action, payload):
+        await charge_point.send_str(json.dumps([2, 'id', action, payload]))
+        return json.loads(await charge_point.receive_str(timeout=5))
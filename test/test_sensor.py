@@ -1,19 +1,23 @@
-from datetime import datetime, timedelta
-from unittest import IsolatedAsyncioTestCase
-from unittest.mock import Mock
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import Mock, patch
 
 from evdutyapi import Terminal, ChargingStatus, ChargingSession, NetworkInfo
-from homeassistant.components.sensor import SensorStateClass, SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity, SensorStateClass, SensorDeviceClass
 from homeassistant.const import UnitOfPower, UnitOfElectricCurrent, UnitOfElectricPotential, UnitOfEnergy, UnitOfTime, EntityCategory, SIGNAL_STRENGTH_DECIBELS_MILLIWATT
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.util import slugify
+from homeassistant.util import slugify, dt as dt_util
 
 from custom_components.evduty import DOMAIN
 from custom_components.evduty.const import MANUFACTURER
+from custom_components.evduty.analytics import SessionStatistics
+from custom_components.evduty.significant_change import SignificantChangePolicy
+from custom_components.evduty.tariff import Tariff, SessionCostMeter
 from custom_components.evduty.sensor import async_setup_entry, PowerSensor, AmpSensor, VoltSensor, EnergyConsumedSensor, ChargingStateSensor, ChargingSessionStartDateSensor, \
-    ChargingSessionDurationSensor, ChargingSessionEstimatedCostSensor, WifiSsidSensor, WifiRssiSensor, WifiIpSensor
+    ChargingSessionDurationSensor, ChargingSessionEstimatedCostSensor, ChargingSessionPeakPowerSensor, ChargingSessionAveragePowerSensor, \
+    ChargingSessionPluggedAveragePowerSensor, ChargingSessionIdleDurationSensor, EnergyRateSensor, WifiSsidSensor, WifiRssiSensor, WifiIpSensor
 
 
 class TestSensorCreation(IsolatedAsyncioTestCase):
@@ -22,6 +26,15 @@ class TestSensorCreation(IsolatedAsyncioTestCase):
         entry = Mock()
         entry.entry_id = 'id'
         self.coordinator = Mock(DataUpdateCoordinator)
+        self.coordinator.tariff = None
+        self.coordinator.currency = 'CAD'
+        self.coordinator.cost_meters = {}
+        self.statistics = SessionStatistics(datetime(2024, 1, 15, 10, tzinfo=timezone.utc))
+        self.statistics.add(datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc), 0, 0)
+        self.statistics.add(datetime(2024, 1, 15, 11, tzinfo=timezone.utc), 7200, 0)
+        self.statistics.add(datetime(2024, 1, 15, 12, tzinfo=timezone.utc), 3600, 7200)
+        self.coordinator.session_statistics = {'123': self.statistics}
+        self.coordinator.significant_change_policies = {}
         self.terminal = Terminal(id='123',
                                  name='Test',
                                  status=ChargingStatus.in_use,
@@ -50,7 +63,7 @@ class TestSensorCreation(IsolatedAsyncioTestCase):
         self.sensors = async_add_devices.call_args.args[0]
 
     async def test_add_sensors_on_setup(self):
-        self.assertEqual(len(self.sensors), 11)
+        self.assertEqual(len(self.sensors), 16)
 
     def test_power_sensor_created(self):
         self.assert_sensor_created(type=PowerSensor,
@@ -110,10 +123,73 @@ class TestSensorCreation(IsolatedAsyncioTestCase):
                                    name='Session Estimated Cost',
                                    state_class=SensorStateClass.TOTAL_INCREASING,
                                    device_class=SensorDeviceClass.MONETARY,
-                                   unit='$',
                                    precision=2,
                                    value=0.32)
 
+    def test_estimated_cost_sensor_uses_configured_currency_without_tariff(self):
+        sensor = next(s for s in self.sensors if isinstance(s, ChargingSessionEstimatedCostSensor))
+
+        self.assertEqual(sensor.native_unit_of_measurement, 'CAD')
+        self.assertEqual(sensor.native_value, 0.32)
+
+    def test_estimated_cost_sensor_uses_local_tariff_when_configured(self):
+        sensor = next(s for s in self.sensors if isinstance(s, ChargingSessionEstimatedCostSensor))
+        meter = SessionCostMeter(self.terminal.session.start_date)
+        meter.cost = 0.5
+        self.coordinator.tariff = Tariff(currency='CAD', rate=0.1)
+        self.coordinator.cost_meters = {'123': meter}
+
+        self.assertEqual(sensor.native_unit_of_measurement, 'CAD')
+        self.assertEqual(sensor.native_value, 0.5)
+
+    def test_session_peak_power_sensor_created(self):
+        self.assert_sensor_created(type=ChargingSessionPeakPowerSensor,
+                                   name='Session Peak Power',
+                                   state_class=SensorStateClass.MEASUREMENT,
+                                   device_class=SensorDeviceClass.POWER,
+                                   unit=UnitOfPower.WATT,
+                                   value=7200)
+
+    def test_session_average_power_sensor_created(self):
+        self.assert_sensor_created(type=ChargingSessionAveragePowerSensor,
+                                   name='Session Average Power',
+                                   state_class=SensorStateClass.MEASUREMENT,
+                                   device_class=SensorDeviceClass.POWER,
+                                   unit=UnitOfPower.WATT,
+                                   precision=0,
+                                   value=7200)
+
+    def test_session_plugged_average_power_sensor_created(self):
+        self.assert_sensor_created(type=ChargingSessionPluggedAveragePowerSensor,
+                                   name='Session Plugged Average Power',
+                                   state_class=SensorStateClass.MEASUREMENT,
+                                   device_class=SensorDeviceClass.POWER,
+                                   unit=UnitOfPower.KILO_WATT,
+                                   precision=2,
+                                   value=3.6)
+
+    def test_session_idle_duration_sensor_created(self):
+        self.assert_sensor_created(type=ChargingSessionIdleDurationSensor,
+                                   name='Session Idle Duration',
+                                   device_class=SensorDeviceClass.DURATION,
+                                   unit=UnitOfTime.SECONDS,
+                                   value=1800)
+
+    def test_energy_rate_sensor_created(self):
+        self.assert_sensor_created(type=EnergyRateSensor,
+                                   name='Energy Rate',
+                                   state_class=SensorStateClass.MEASUREMENT,
+                                   device_class=SensorDeviceClass.POWER,
+                                   unit=UnitOfPower.KILO_WATT,
+                                   precision=2,
+                                   value=7.2)
+
+    def test_session_statistics_sensors_unknown_without_session(self):
+        self.coordinator.session_statistics = {}
+        sensor = next(s for s in self.sensors if isinstance(s, ChargingSessionPeakPowerSensor))
+
+        self.assertIsNone(sensor.native_value)
+
     def test_wifi_ip_sensor_created(self):
         self.assert_sensor_created(type=WifiIpSensor,
                                    name='Wi-Fi IP',
@@ -162,3 +238,87 @@ class TestSensorCreation(IsolatedAsyncioTestCase):
         self.assertEqual(sensor._attr_unique_id, f'evduty_test_{slugify(name)}')
 
         self.assertEqual(sensor.native_value, value)
+
+
+@patch.object(SensorEntity, 'async_write_ha_state')
+class TestSensorSignificantChange(TestCase):
+
+    def setUp(self):
+        self.coordinator = Mock(DataUpdateCoordinator)
+        self.coordinator.significant_change_policies = {'volt': SignificantChangePolicy(absolute=2, min_interval=timedelta(minutes=5))}
+        self.terminal = self.terminal_with(volt=240)
+        self.coordinator.data = {'123': self.terminal}
+        self.coordinator.last_update_success = True
+        self.sensor = VoltSensor(self.coordinator, self.terminal)
+
+    def test_first_update_is_written(self, async_write_ha_state):
+        self.update(volt=241)
+
+        async_write_ha_state.assert_called_once()
+
+    def test_change_within_deadband_is_not_written(self, async_write_ha_state):
+        self.written(240, dt_util.utcnow() - timedelta(minutes=10))
+
+        self.update(volt=241)
+
+        async_write_ha_state.assert_not_called()
+
+    def test_change_past_deadband_is_written(self, async_write_ha_state):
+        self.written(240, dt_util.utcnow() - timedelta(minutes=10))
+
+        self.update(volt=243)
+
+        async_write_ha_state.assert_called_once()
+
+    def test_change_within_min_interval_is_not_written(self, async_write_ha_state):
+        self.written(240, dt_util.utcnow() - timedelta(minutes=1))
+
+        self.update(volt=250)
+
+        async_write_ha_state.assert_not_called()
+
+    def test_session_start_is_always_written(self, async_write_ha_state):
+        self.written(240, dt_util.utcnow())
+
+        self.update(volt=240, status=ChargingStatus.in_use, is_active=True)
+
+        async_write_ha_state.assert_called_once()
+
+    def test_update_failure_is_always_written(self, async_write_ha_state):
+        self.written(240, dt_util.utcnow())
+        self.coordinator.last_update_success = False
+
+        self.update(volt=240)
+
+        async_write_ha_state.assert_called_once()
+
+    def test_recovery_from_update_failure_is_always_written(self, async_write_ha_state):
+        self.written(240, dt_util.utcnow())
+        self.sensor._written_available = False
+
+        self.update(volt=240)
+
+        async_write_ha_state.assert_called_once()
+
+    def test_sensors_without_policy_are_always_written(self, async_write_ha_state):
+        sensor = ChargingStateSensor(self.coordinator, self.terminal)
+
+        self.coordinator.data = {'123': self.terminal_with(volt=240)}
+        sensor._handle_coordinator_update()
+
+        async_write_ha_state.assert_called_once()
+
+    def written(self, value, at):
+        self.sensor._written_value, self.sensor._written_at, self.sensor._written_available = value, at, True
+
+    def update(self, **kwargs):
+        self.coordinator.data = {'123': self.terminal_with(**kwargs)}
+        self.sensor._handle_coordinator_update()
+
+    @staticmethod
+    def terminal_with(volt, status=ChargingStatus.available, is_active=False):
+        session = ChargingSession.no_session()
+        session.volt = volt
+        session.is_active = is_active
+        return Terminal(id='123', name='Test', status=status, charge_box_identity='A', firmware_version='1.2.3', session=session,
+                        network_info=NetworkInfo(wifi_ssid="ssid", wifi_rssi=-72, ip_address="ip", mac_address="mac"))
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import Mock, AsyncMock, patch
+
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.device_registry import DeviceEntry
+
+from custom_components.evduty import DOMAIN
+from custom_components.evduty.services import async_setup_services, SERVICE_QUERY_SESSIONS
+from custom_components.evduty.session_log import SessionLog
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+END = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+
+class TestQuerySessionsService(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.session_log = Mock(SessionLog)
+        self.session_log.query.return_value = {'123': {'sessions': 2, 'energy': 15, 'cost': 1.5, 'duration': 3600, 'peak_power': 7200}}
+        coordinator = Mock()
+        coordinator.session_log = self.session_log
+
+        self.hass = Mock(HomeAssistant)
+        self.hass.data = {DOMAIN: {'entry': coordinator}}
+        self.hass.services = Mock()
+        self.hass.async_add_executor_job = AsyncMock(side_effect=lambda target, *args: target(*args))
+
+        async_setup_services(self.hass)
+        self.service = self.hass.services.async_register.call_args.args[2]
+
+    def test_registers_service_with_response(self):
+        args = self.hass.services.async_register.call_args
+        self.assertEqual(args.args[:2], (DOMAIN, SERVICE_QUERY_SESSIONS))
+        self.assertEqual(args.kwargs['supports_response'], SupportsResponse.ONLY)
+
+    async def test_returns_aggregates_of_all_terminals(self):
+        response = await self.service(ServiceCall(DOMAIN, SERVICE_QUERY_SESSIONS, {'start': START, 'end': END}))
+
+        self.session_log.query.assert_called_once_with(START, END, None)
+        self.assertEqual(response['sessions'], 2)
+        self.assertEqual(response['terminals'], self.session_log.query.return_value)
+
+    @patch('custom_components.evduty.services.dr.async_get')
+    async def test_filters_by_device(self, device_registry_get):
+        device = Mock(DeviceEntry)
+        device.identifiers = {(DOMAIN, '123')}
+        device_registry_get.return_value.async_get.return_value = device
+
+        await self.service(ServiceCall(DOMAIN, SERVICE_QUERY_SESSIONS, {'start': START, 'end': END, 'device_id': ['device']}))
+
+        self.session_log.query.assert_called_once_with(START, END, ['123'])
+
+    @patch('custom_components.evduty.services.dr.async_get')
+    async def test_raises_on_unknown_device(self, device_registry_get):
+        device_registry_get.return_value.async_get.return_value = None
+
+        with self.assertRaises(ServiceValidationError):
+            await self.service(ServiceCall(DOMAIN, SERVICE_QUERY_SESSIONS, {'start': START, 'end': END, 'device_id': ['device']}))
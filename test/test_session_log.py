@@ -0,0 +1,94 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from custom_components.evduty.session_log import SessionLog, LoggedSession, summarize, SCHEMA
+
+START = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+
+def session(terminal_id='123', days=0, hours=2, energy=10, cost=1, peak_power=7200):
+    start = START + timedelta(days=days)
+    return LoggedSession(terminal_id=terminal_id, start=start, end=start + timedelta(hours=hours), energy=energy, cost=cost, peak_power=peak_power)
+
+
+class TestSessionLog(TestCase):
+
+    def setUp(self):
+        self.log = SessionLog(':memory:')
+        self.log.open()
+
+    def tearDown(self):
+        self.log.close()
+
+    def test_add_is_buffered_until_flush(self):
+        self.log.add(session())
+
+        self.assertTrue(self.log.pending)
+        self.log.flush()
+        self.assertFalse(self.log.pending)
+
+    def test_failed_flush_keeps_sessions_pending(self):
+        self.log.add(session())
+        self.log._connection.execute('DROP TABLE sessions')
+
+        with self.assertRaises(sqlite3.OperationalError):
+            self.log.flush()
+        self.assertTrue(self.log.pending)
+
+        self.log._connection.executescript(SCHEMA)
+        self.log.flush()
+        self.assertEqual(self.log.query(START, START + timedelta(days=1))['123']['sessions'], 1)
+
+    def test_query_aggregates_per_terminal(self):
+        self.log.add(session(days=0, energy=10, cost=1, peak_power=7200))
+        self.log.add(session(days=1, hours=1, energy=5, cost=0.5, peak_power=3600))
+        self.log.add(session(terminal_id='456', energy=20, cost=2, peak_power=9600))
+        self.log.flush()
+
+        terminals = self.log.query(START, START + timedelta(days=2))
+
+        self.assertEqual(terminals, {'123': {'sessions': 2, 'energy': 15, 'cost': 1.5, 'duration': 3 * 3600, 'peak_power': 7200},
+                                     '456': {'sessions': 1, 'energy': 20, 'cost': 2, 'duration': 2 * 3600, 'peak_power': 9600}})
+
+    def test_query_date_range(self):
+        self.log.add(session(days=0))
+        self.log.add(session(days=1))
+        self.log.add(session(days=2))
+
+        terminals = self.log.query(START + timedelta(days=1), START + timedelta(days=2))
+
+        self.assertEqual(terminals['123']['sessions'], 1)
+
+    def test_query_terminals(self):
+        self.log.add(session(terminal_id='123'))
+        self.log.add(session(terminal_id='456'))
+
+        terminals = self.log.query(START, START + timedelta(days=1), terminal_ids=['456'])
+
+        self.assertEqual(list(terminals), ['456'])
+
+    def test_same_session_logged_once(self):
+        self.log.add(session(energy=10))
+        self.log.flush()
+        self.log.add(session(energy=12))
+
+        terminals = self.log.query(START, START + timedelta(days=1))
+
+        self.assertEqual(terminals['123']['sessions'], 1)
+        self.assertEqual(terminals['123']['energy'], 12)
+
+    def test_query_without_sessions(self):
+        self.assertEqual(self.log.query(START, START + timedelta(days=1)), {})
+
+
+class TestSummarize(TestCase):
+
+    def test_totals(self):
+        terminals = {'123': {'sessions': 2, 'energy': 15, 'cost': 1.5, 'duration': 3600, 'peak_power': 7200},
+                     '456': {'sessions': 1, 'energy': 20, 'cost': 2, 'duration': 7200, 'peak_power': 9600}}
+
+        self.assertEqual(summarize(terminals), {'sessions': 3, 'energy': 35, 'cost': 3.5, 'duration': 10800, 'peak_power': 9600, 'terminals': terminals})
+
+    def test_empty(self):
+        self.assertEqual(summarize({}), {'sessions': 0, 'energy': 0, 'cost': 0, 'duration': 0, 'peak_power': 0, 'terminals': {}})
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from custom_components.evduty.significant_change import SignificantChangePolicy, policies_from_options
+
+NOW = datetime(2024, 1, 15, 10, tzinfo=timezone.utc)
+
+
+class TestSignificantChangePolicy(TestCase):
+
+    def test_any_change_is_significant_without_deadband(self):
+        policy = SignificantChangePolicy()
+
+        self.assertTrue(policy.is_significant(240, 240.1))
+        self.assertFalse(policy.is_significant(240, 240))
+
+    def test_absolute_deadband(self):
+        policy = SignificantChangePolicy(absolute=2)
+
+        self.assertFalse(policy.is_significant(240, 241))
+        self.assertTrue(policy.is_significant(240, 238))
+
+    def test_relative_deadband(self):
+        policy = SignificantChangePolicy(relative=0.05)
+
+        self.assertFalse(policy.is_significant(1000, 1040))
+        self.assertTrue(policy.is_significant(1000, 1050))
+
+    def test_change_must_pass_both_deadbands(self):
+        policy = SignificantChangePolicy(absolute=100, relative=0.01)
+
+        self.assertFalse(policy.is_significant(1000, 1050))
+        self.assertTrue(policy.is_significant(1000, 1100))
+
+    def test_change_from_or_to_unknown_is_significant(self):
+        policy = SignificantChangePolicy(absolute=2)
+
+        self.assertTrue(policy.is_significant(None, 240))
+        self.assertTrue(policy.is_significant(240, None))
+
+    def test_first_write(self):
+        self.assertTrue(SignificantChangePolicy(absolute=2).should_write(None, None, 240, NOW))
+
+    def test_min_interval(self):
+        policy = SignificantChangePolicy(min_interval=timedelta(minutes=5))
+
+        self.assertFalse(policy.should_write(240, NOW - timedelta(minutes=1), 250, NOW))
+        self.assertTrue(policy.should_write(240, NOW - timedelta(minutes=5), 250, NOW))
+
+
+class TestPoliciesFromOptions(TestCase):
+
+    def test_defaults(self):
+        policies = policies_from_options({})
+
+        self.assertEqual(policies, {'volt': SignificantChangePolicy(absolute=1),
+                                    'amp': SignificantChangePolicy(absolute=0.5),
+                                    'power': SignificantChangePolicy(absolute=50),
+                                    'wifi_rssi': SignificantChangePolicy(absolute=3)})
+
+    def test_options(self):
+        policies = policies_from_options({'power_absolute_deadband': 100, 'power_relative_deadband': 5, 'power_min_interval': 300})
+
+        self.assertEqual(policies['power'], SignificantChangePolicy(absolute=100, relative=0.05, min_interval=timedelta(seconds=300)))
@@ -0,0 +1,107 @@
+from datetime import datetime, time, timezone
+from unittest import TestCase
+
+from homeassistant.const import CONF_CURRENCY
+
+from custom_components.evduty.const import CONF_ENERGY_RATE, CONF_TOU_SCHEDULE
+from custom_components.evduty.tariff import Tariff, TariffPeriod, SessionCostMeter, parse_schedule
+
+
+def at(hour, minute=0):
+    return datetime(2024, 1, 15, hour, minute, tzinfo=timezone.utc)
+
+
+class TestTariff(TestCase):
+
+    def setUp(self):
+        self.tariff = Tariff(currency='CAD', rate=0.10, periods=[TariffPeriod(start=time(7), end=time(11), rate=0.20),
+                                                                 TariffPeriod(start=time(22), end=time(6), rate=0.05)])
+
+    def test_rate_at_uses_base_rate_outside_periods(self):
+        self.assertEqual(self.tariff.rate_at(at(12)), 0.10)
+
+    def test_rate_at_uses_period_rate(self):
+        self.assertEqual(self.tariff.rate_at(at(7)), 0.20)
+        self.assertEqual(self.tariff.rate_at(at(10, 59)), 0.20)
+        self.assertEqual(self.tariff.rate_at(at(11)), 0.10)
+
+    def test_rate_at_supports_periods_crossing_midnight(self):
+        self.assertEqual(self.tariff.rate_at(at(23)), 0.05)
+        self.assertEqual(self.tariff.rate_at(at(2)), 0.05)
+
+    def test_interval_cost_within_a_period(self):
+        self.assertAlmostEqual(self.tariff.interval_cost(at(8), at(9), 2), 0.40)
+
+    def test_interval_cost_splits_energy_across_rate_changes(self):
+        # 1 kWh before 11:00 at 0.20, 1 kWh after at 0.10
+        self.assertAlmostEqual(self.tariff.interval_cost(at(10), at(12), 2), 0.30)
+
+    def test_interval_cost_ignores_negative_energy(self):
+        self.assertEqual(self.tariff.interval_cost(at(10), at(12), -1), 0)
+
+    def test_session_cost_sums_sample_deltas(self):
+        samples = [(at(10), 0), (at(11), 1000), (at(12), 3000)]
+
+        self.assertAlmostEqual(self.tariff.session_cost(samples), 0.20 + 0.20)
+
+    def test_from_options(self):
+        options = {CONF_CURRENCY: 'EUR', CONF_ENERGY_RATE: 0.3, CONF_TOU_SCHEDULE: '07:00-11:00=0.4'}
+
+        self.assertEqual(Tariff.from_options(options, 'CAD'), Tariff(currency='EUR', rate=0.3, periods=[TariffPeriod(start=time(7), end=time(11), rate=0.4)]))
+
+    def test_from_options_defaults_currency(self):
+        self.assertEqual(Tariff.from_options({CONF_ENERGY_RATE: 0.3}, 'CAD').currency, 'CAD')
+
+    def test_from_options_without_rate_returns_none(self):
+        self.assertIsNone(Tariff.from_options({}, 'CAD'))
+
+
+class TestParseSchedule(TestCase):
+
+    def test_parse_periods(self):
+        self.assertEqual(parse_schedule('07:00-11:00=0.2, 22:30-06:00=0.05'), [TariffPeriod(start=time(7), end=time(11), rate=0.2),
+                                                                             TariffPeriod(start=time(22, 30), end=time(6), rate=0.05)])
+
+    def test_parse_empty_schedule(self):
+        self.assertEqual(parse_schedule(''), [])
+
+    def test_raise_on_invalid_period(self):
+        with self.assertRaises(ValueError):
+            parse_schedule('7h-11h')
+
+
+class TestSessionCostMeter(TestCase):
+
+    def setUp(self):
+        self.tariff = Tariff(currency='CAD', rate=0.10, periods=[TariffPeriod(start=time(11), end=time(12), rate=0.20)])
+
+    def test_add_accumulates_cost_per_sample(self):
+        meter = SessionCostMeter(at(10))
+        meter.add(at(11), 1000, self.tariff)
+        meter.add(at(12), 3000, self.tariff)
+
+        self.assertAlmostEqual(meter.cost, 0.10 + 0.40)
+        self.assertEqual(meter.energy, 3000)
+
+    def test_add_ignores_samples_out_of_order(self):
+        meter = SessionCostMeter(at(10))
+        meter.add(at(11), 1000, self.tariff)
+        meter.add(at(11), 2000, self.tariff)
+
+        self.assertEqual(len(meter.samples), 2)
+
+    def test_add_without_tariff_keeps_samples(self):
+        meter = SessionCostMeter(at(10))
+        meter.add(at(11), 1000, None)
+
+        self.assertEqual(meter.cost, 0)
+        self.assertEqual(meter.samples, [(at(10), 0), (at(11), 1000)])
+
+    def test_recompute_with_new_tariff(self):
+        meter = SessionCostMeter(at(10))
+        meter.add(at(11), 1000, self.tariff)
+        meter.add(at(12), 3000, self.tariff)
+
+        meter.recompute(Tariff(currency='CAD', rate=1))
+
+        self.assertAlmostEqual(meter.cost, 3)